@@ -1,242 +1,1871 @@
-import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import pandas as pd
+from __future__ import annotations
+
 import os
 import hashlib
+import functools
+import collections
+import contextlib
+import cProfile
+import importlib.util
+import itertools
+import shutil
+import tempfile
+import math
+import zipfile
+import re
+from xml.etree import ElementTree
+import pickle
+import bisect
 from difflib import SequenceMatcher
 import argparse
 import sys
 import logging
-from typing import Dict, List, Tuple
-from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor
-import multiprocessing
+import time
+import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import concurrent.futures
 import json
 import csv
 
-# Set up logging configuration
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Modules bound by lazy_import, loaded on first use
+LAZY_MODULES = []
+
+def lazy_import(name: str):
+    """
+    Import a module on first attribute access instead of now.
+
+    pandas and numpy take most of the start-up time, so they are bound lazily and `--help`,
+    argument errors and workers that never touch them do not pay for them. openpyxl, tqdm
+    and pyarrow are imported inside the functions that use them.
+
+    Args:
+        name (str): Name of the module.
+
+    Returns:
+        The module, loaded on first use.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    LAZY_MODULES.append(name)
+    return module
+
+def finish_lazy_imports() -> None:
+    """
+    Load every module bound by lazy_import now.
+
+    A lazily loaded module is not safe to load from several threads at once before Python
+    3.12, so code that starts threads calls this first.
+    """
+    for name in LAZY_MODULES:
+        # Any attribute access runs the deferred import; reading the namespace is the cheapest one
+        vars(importlib.import_module(name))
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Number of leading results used to size the columns of the Excel report
+WIDTH_SAMPLE_ROWS = 1000
+
+# Maximum number of entries in each worker's similarity and normalization caches
+SIMILARITY_CACHE_SIZE = 100000
+
+# Number of results per Parquet row group / Arrow record batch
+ARROW_BATCH_ROWS = 100000
+
+# Minimum overlap of distinct values for a dropped and an added column to count as a rename
+RENAME_SIMILARITY = 0.8
+
+# Manifest of the stored snapshot in an incremental state directory
+SNAPSHOT_MANIFEST = 'snapshot.json'
+
+# File extension of the report for each output format
+OUTPUT_EXTENSIONS = {'excel': 'xlsx', 'csv': 'csv', 'json': 'json', 'jsonl': 'jsonl', 'parquet': 'parquet', 'feather': 'feather'}
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz
+except ImportError:
+    rapidfuzz_fuzz = None
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Per-process work counters (rows parsed, cells scored, ...); run_instrumented reports each task's share
+worker_counters = collections.Counter()
+
+# Per-worker cProfile collector, created on the first profiled task of the process
+worker_profiler = None
+
+# Per-worker read-only workbooks kept open across stream tasks, most recently used last
+worker_workbooks = collections.OrderedDict()
+WORKER_WORKBOOK_LIMIT = 4
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def expand_merged_cells(sheet: pd.DataFrame, ranges: List[Tuple[int, int, int, int]]) -> pd.DataFrame:
+    """
+    Copy the value of each merged range's top-left cell to every cell of the range.
+
+    Works on the parsed sheet rather than the workbook: the target positions of all ranges
+    are gathered with numpy and written one column at a time. Excel row N is sheet row
+    N - 2, since row 1 holds the headers; ranges starting in the header row are left alone
+    and ranges are clipped to the sheet.
+
+    Args:
+        sheet (pd.DataFrame): The parsed sheet.
+        ranges (List[Tuple[int, int, int, int]]): Merged ranges as (min_col, min_row, max_col, max_row), 1-based.
+
+    Returns:
+        pd.DataFrame: The sheet with merged ranges filled in.
+    """
+    n_rows, n_cols = sheet.shape
+    rows, cols, values = [], [], []
+    for min_col, min_row, max_col, max_row in ranges:
+        top, left = min_row - 2, min_col - 1
+        if top < 0 or top >= n_rows or left >= n_cols:
+            continue
+        block_rows, block_cols = np.meshgrid(np.arange(top, min(max_row - 1, n_rows)), np.arange(left, min(max_col, n_cols)), indexing='ij')
+        rows.append(block_rows.ravel())
+        cols.append(block_cols.ravel())
+        values.append(np.full(block_rows.size, sheet.iat[top, left], dtype=object))
+    if not rows:
+        return sheet
+
+    rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+    sheet = sheet.copy()
+    for col in np.unique(cols):
+        mask = cols == col
+        column = sheet.iloc[:, col].to_numpy(dtype=object, copy=True)
+        column[rows[mask]] = values[mask]
+        sheet[sheet.columns[col]] = pd.Series(column, index=sheet.index).infer_objects()
+    return sheet
+
+def expand_merged_rows(rows: Iterable[Tuple], ranges: List[Tuple[int, int, int, int]]) -> Iterator[Tuple]:
+    """
+    Streaming counterpart of expand_merged_cells: fill merged ranges into rows as they are read.
+
+    Only the ranges overlapping the current row are kept, with the top-left value they carry.
+
+    Args:
+        rows (Iterable[Tuple]): Rows of a sheet, header row first (e.g. from iter_sheet_rows).
+        ranges (List[Tuple[int, int, int, int]]): Merged ranges as (min_col, min_row, max_col, max_row), 1-based.
+
+    Yields:
+        Tuple: The rows with merged ranges filled in.
+    """
+    pending = sorted((r for r in ranges if r[1] >= 2), key=lambda r: r[1], reverse=True)
+    active = []
+    for row_number, row in enumerate(rows, start=1):
+        while pending and pending[-1][1] == row_number:
+            min_col, min_row, max_col, max_row = pending.pop()
+            active.append((min_col, max_col, max_row, row[min_col - 1] if min_col <= len(row) else None))
+        active = [a for a in active if a[2] >= row_number]
+        if active:
+            row = list(row)
+            for min_col, max_col, _, value in active:
+                row[min_col - 1:min(max_col, len(row))] = [value] * (min(max_col, len(row)) - min_col + 1)
+            row = tuple(row)
+        yield row
+
+def get_function_details(sheet: pd.DataFrame, key_column: str) -> Dict[str, Dict[str, str]]:
+    """
+    Extract function details from an already parsed sheet.
+    
+    Args:
+        sheet (pd.DataFrame): The sheet containing the function details.
+        key_column (str): The name of the column containing the function IDs.
+    
+    Returns:
+        Dict[str, Dict[str, str]]: A dictionary mapping function IDs to their details.
+    """
+    function_details = {}
+    try:
+        keys = column_as_strings(sheet[key_column])
+        names = sheet['Function Name'].astype(object).where(sheet['Function Name'].notna(), None)
+        owners = sheet['Owner'].astype(object).where(sheet['Owner'].notna(), None)
+        present = sheet[key_column].notna() & (sheet[key_column] != '')
+        
+        for key, name, owner in zip(keys[present], names[present], owners[present]):
+            function_details[key] = {'name': name, 'owner': owner}
+    except Exception as e:
+        logger.error(f"Error in getting function details: {e}")
+        raise
+    return function_details
+
+def generate_hash(values: List[str]) -> str:
+    """
+    Generate a hash value based on a list of values.
+
+    Args:
+        values (List[str]): List of values to hash.
+
+    Returns:
+        str: A hash string representing the combined values.
+    """
+    hash_input = '|'.join([str(v) for v in values])
+    return hashlib.blake2b(hash_input.encode('utf-8'), digest_size=16).hexdigest()
+
+def sequence_matcher_ratio(s1: str, s2: str, cutoff: float = 0.0) -> float:
+    """
+    Similarity ratio from difflib's SequenceMatcher.
+
+    The cheap upper bounds real_quick_ratio() and quick_ratio() are checked first; if either
+    already falls below cutoff, that bound is returned without computing the full ratio.
+
+    Args:
+        s1 (str): The first string to compare.
+        s2 (str): The second string to compare.
+        cutoff (float): Ratios below this value only need to be known to be below it.
+
+    Returns:
+        float: The similarity ratio, or an upper bound of it that is below cutoff.
+    """
+    matcher = SequenceMatcher(None, s1, s2)
+    if cutoff > 0:
+        bound = matcher.real_quick_ratio()
+        if bound < cutoff:
+            return bound
+        bound = matcher.quick_ratio()
+        if bound < cutoff:
+            return bound
+    return matcher.ratio()
+
+def indel_ratio(s1: str, s2: str, cutoff: float = 0.0) -> float:
+    """
+    Similarity ratio based on the insertion/deletion edit distance, 2 * LCS / (len1 + len2).
+
+    Uses rapidfuzz when it is installed. Otherwise the longest common subsequence is computed
+    with a bit-parallel algorithm on Python integers, one word operation per character of the
+    longer string. The length ratio is checked first as a cheap upper bound against cutoff.
+
+    Args:
+        s1 (str): The first string to compare.
+        s2 (str): The second string to compare.
+        cutoff (float): Ratios below this value only need to be known to be below it.
+
+    Returns:
+        float: The similarity ratio, or an upper bound of it that is below cutoff.
+    """
+    total = len(s1) + len(s2)
+    if total == 0:
+        return 1.0
+    bound = 2 * min(len(s1), len(s2)) / total
+    if bound < cutoff:
+        return bound
+    if rapidfuzz_fuzz is not None:
+        return rapidfuzz_fuzz.ratio(s1, s2) / 100
+
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    masks = {}
+    for i, char in enumerate(s2):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    all_ones = (1 << len(s2)) - 1
+    row = all_ones
+    for char in s1:
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & all_ones
+    lcs = len(s2) - bin(row).count('1')
+    return 2 * lcs / total
+
+# Similarity scorers selectable with --scorer
+SCORERS = {
+    'sequencematcher': sequence_matcher_ratio,
+    'indel': indel_ratio
+}
+
+@functools.lru_cache(maxsize=SIMILARITY_CACHE_SIZE)
+def normalize_text(value: str) -> str:
+    """
+    Normalize a value for comparison (strip and lowercase).
+
+    Memoized, so a value repeated down a column is normalized once and every repeat gets
+    the very same string object back, which keeps the similarity cache lookups cheap.
+
+    Args:
+        value (str): The value to normalize.
+
+    Returns:
+        str: The normalized value.
+    """
+    return value.strip().lower()
+
+@functools.lru_cache(maxsize=SIMILARITY_CACHE_SIZE)
+def cached_similarity(s1: str, s2: str, scorer: str, cutoff: float) -> float:
+    """
+    Memoized similarity ratio of two normalized strings.
+
+    Each worker process keeps its own bounded LRU cache, so repeated categorical values
+    (statuses, owners, copied descriptions) are scored once per worker.
+
+    Args:
+        s1 (str): The first normalized string.
+        s2 (str): The second normalized string.
+        scorer (str): Name of the scorer in SCORERS.
+        cutoff (float): Ratios below this value may be returned as any upper bound below it.
+
+    Returns:
+        float: A similarity ratio between 0 and 1.
+    """
+    return SCORERS[scorer](s1, s2, cutoff)
+
+def compare_strings(s1: str, s2: str, scorer: str = 'sequencematcher', cutoff: float = 0.0) -> float:
+    """
+    Compare two strings and return a similarity ratio using the selected scorer.
+
+    Args:
+        s1 (str): The first string to compare.
+        s2 (str): The second string to compare.
+        scorer (str): Name of the scorer in SCORERS (default: 'sequencematcher').
+        cutoff (float): Ratios below this value may be returned as any upper bound below it.
+
+    Returns:
+        float: A similarity ratio between 0 and 1.
+    """
+    s1 = normalize_text(str(s1))
+    s2 = normalize_text(str(s2))
+    if s1 == s2:
+        return 1.0
+    return cached_similarity(s1, s2, scorer, cutoff)
+
+def categorize_change(ratio: float, minor_threshold: float, major_threshold: float) -> str:
+    """
+    Categorize the type of change based on the similarity ratio.
+
+    Args:
+        ratio (float): The similarity ratio between 0 and 1.
+        minor_threshold (float): Threshold above which a change is considered minor.
+        major_threshold (float): Threshold above which a change is considered major.
+
+    Returns:
+        str: The category of change ('No change', 'Minor change', 'Major change', 'Substantial change').
+    """
+    if ratio == 1:
+        return 'No change'
+    elif ratio >= minor_threshold:
+        return 'Minor change'
+    elif ratio >= major_threshold:
+        return 'Major change'
+    else:
+        return 'Substantial change'
+
+def compare_chunks(chunk1: pd.DataFrame, chunk2: pd.DataFrame, sheet_name: str, minor_threshold: float, major_threshold: float, function_details: Dict[str, Dict[str, str]], rows1: Optional[Dict[str, int]] = None, rows2: Optional[Dict[str, int]] = None, include_unchanged: bool = False, scorer: str = 'sequencematcher') -> List[Tuple]:
+    """
+    Compare two chunks of data and return the comparison results.
+
+    Equal cells are masked out in bulk, so the similarity scorer only sees cells whose
+    values differ. Unchanged cells are reported only when include_unchanged is set.
+    
+    Args:
+        chunk1 (pd.DataFrame): DataFrame chunk from the first sheet.
+        chunk2 (pd.DataFrame): DataFrame chunk from the second sheet.
+        sheet_name (str): Name of the sheet being compared.
+        minor_threshold (float): Threshold for minor changes.
+        major_threshold (float): Threshold for major changes.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        rows1 (Optional[Dict[str, int]]): Row label to Excel row number for the first sheet (defaults to the label itself).
+        rows2 (Optional[Dict[str, int]]): Row label to Excel row number for the second sheet (defaults to the label itself).
+        include_unchanged (bool): Whether to emit 'No change' results for identical cells.
+        scorer (str): Name of the similarity scorer in SCORERS.
+    
+    Returns:
+        List[Tuple]: List of comparison results.
+    """
+    results = []
+    rows1 = rows1 or {}
+    rows2 = rows2 or {}
+    
+    # Ensure index is treated as strings
+    chunk1 = chunk1.set_axis(chunk1.index.astype(str))
+    chunk2 = chunk2.set_axis(chunk2.index.astype(str))
+
+    in_chunk2 = chunk1.index.isin(chunk2.index)
+    common = chunk1.index[in_chunk2]
+    only1 = chunk1.index[~in_chunk2]
+    only2 = chunk2.index[~chunk2.index.isin(chunk1.index)]
+    # Columns present on one side only are reported once by align_columns, not cell by cell
+    columns = chunk1.columns.intersection(chunk2.columns, sort=False)
+
+    # Build an equality mask for the whole block at once; only unequal cells reach the scorer.
+    # Concatenating first gives both sides the same column dtypes (e.g. int vs float).
+    combined = pd.concat([chunk1.loc[common, columns], chunk2.loc[common, columns]])
+    values = combined.to_numpy(dtype=object)
+    values1, values2 = values[:len(common)], values[len(common):]
+    both_na = pd.isna(values1) & pd.isna(values2)
+    unchanged = (values1 == values2) | both_na
+    worker_counters['cells_compared'] += unchanged.size
+    worker_counters['cells_scored'] += int(np.count_nonzero(~unchanged))
+
+    # Per-chunk lookup tables, built once per column and once per row
+    suffixes = [f" ({col})" for col in columns]
+    letters1 = column_letters(chunk1.columns, columns)
+    letters2 = column_letters(chunk2.columns, columns)
+    ids, names, owners = resolve_function_details(common, function_details)
+    numbers1 = [rows1.get(label, label) for label in common]
+    numbers2 = [rows2.get(label, label) for label in common]
+
+    # Transposing yields (column, row) pairs so results stay grouped by column
+    candidates = ~both_na if include_unchanged else ~unchanged
+    col_positions, row_positions = np.nonzero(candidates.T)
+    cells1 = values1[row_positions, col_positions]
+    cells2 = values2[row_positions, col_positions]
+
+    # Anything scoring below the major threshold is a substantial change, whatever its exact ratio
+    change_types = [
+        'No change' if same else categorize_change(compare_strings(str(val1), str(val2), scorer, major_threshold), minor_threshold, major_threshold)
+        for val1, val2, same in zip(cells1, cells2, unchanged[row_positions, col_positions])
+    ]
+
+    results.extend(
+        (ids[r], names[r], owners[r], sheet_name,
+         f"{letters1[c]}{numbers1[r]}{suffixes[c]}", val1,
+         f"{letters2[c]}{numbers2[r]}{suffixes[c]}" if letters2[c] else '', val2,
+         change_type)
+        for c, r, val1, val2, change_type in zip(col_positions, row_positions, cells1, cells2, change_types)
+        if include_unchanged or change_type != 'No change'
+    )
+
+    # Rows present in only one of the chunks (e.g. the tail of the longer sheet)
+    for chunk, labels, rows, source in ((chunk1, only1, rows1, 'source1'), (chunk2, only2, rows2, 'source2')):
+        if not len(labels):
+            continue
+        block_columns = columns.intersection(chunk.columns, sort=False)
+        values = chunk.loc[labels, block_columns].to_numpy(dtype=object)
+        block_suffixes = [f" ({col})" for col in block_columns]
+        block_letters = column_letters(chunk.columns, block_columns)
+        ids, names, owners = resolve_function_details(labels, function_details)
+        numbers = [rows.get(label, label) for label in labels]
+
+        col_positions, row_positions = np.nonzero(~pd.isna(values).T)
+        cells = [f"{block_letters[c]}{numbers[r]}{block_suffixes[c]}" for c, r in zip(col_positions, row_positions)]
+        if source == 'source1':
+            results.extend((ids[r], names[r], owners[r], sheet_name, cell, val, '', '', 'Cell deleted')
+                           for r, cell, val in zip(row_positions, cells, values[row_positions, col_positions]))
+        else:
+            results.extend((ids[r], names[r], owners[r], sheet_name, '', '', cell, val, 'Cell added')
+                           for r, cell, val in zip(row_positions, cells, values[row_positions, col_positions]))
+    
+    return results
+
+def column_letters(chunk_columns: pd.Index, columns: pd.Index) -> List[str]:
+    """
+    Look up the Excel column letter of each column within a chunk.
+
+    Args:
+        chunk_columns (pd.Index): The columns of the chunk, in sheet order.
+        columns (pd.Index): The columns to look up.
+
+    Returns:
+        List[str]: The letter of each column in chunk_columns, or '' if it is not there.
+    """
+    from openpyxl.utils import get_column_letter
+
+    positions = {}
+    for position, col in enumerate(chunk_columns):
+        positions.setdefault(col, position)
+    return [get_column_letter(positions[col] + 1) if col in positions else '' for col in columns]
+
+def resolve_function_details(labels: pd.Index, function_details: Dict[str, Dict[str, str]]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Resolve the function ID, name and owner of every row label once.
+
+    Args:
+        labels (pd.Index): Row labels of a chunk.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: Function IDs, names and owners, one per label.
+    """
+    ids = [str(label) for label in labels]
+    details = [function_details.get(function_id, {}) for function_id in ids]
+    return ids, [d.get('name', '') for d in details], [d.get('owner', '') for d in details]
+
+def column_as_strings(values: pd.Series) -> pd.Series:
+    """
+    Convert a column to strings in one vectorized step.
+
+    Integral floats (e.g. IDs in a column with blanks) are rendered as '101' rather than
+    '101.0' so that the same value reads identically whatever dtype pandas inferred.
+
+    Args:
+        values (pd.Series): The column to convert.
+
+    Returns:
+        pd.Series: The column as strings.
+    """
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype('Int64')
+    return values.astype(str)
+
+def build_row_keys(sheet: pd.DataFrame, key_columns: List[str]) -> pd.Index:
+    """
+    Build a string key for every row of a sheet from one or more key columns.
+
+    Composite keys are joined with '|'. Duplicate keys are disambiguated with an
+    occurrence suffix ('#2', '#3', ...) so the resulting index is always unique.
+
+    Args:
+        sheet (pd.DataFrame): DataFrame of the sheet.
+        key_columns (List[str]): Names of the columns that identify a row.
+
+    Returns:
+        pd.Index: A unique string index with one key per row.
+    """
+    missing = [col for col in key_columns if col not in sheet.columns]
+    if missing:
+        raise KeyError(f"Key column(s) not found: {', '.join(missing)}")
+
+    keys = None
+    for col in key_columns:
+        values = column_as_strings(sheet[col])
+        keys = values if keys is None else keys + '|' + values
+
+    occurrence = keys.groupby(keys).cumcount()
+    duplicated = occurrence > 0
+    if duplicated.any():
+        logger.warning(f"{int(duplicated.sum())} duplicate key(s) found in {', '.join(key_columns)}; suffixing with occurrence number.")
+        keys = keys.where(~duplicated, keys + '#' + (occurrence + 1).astype(str))
+
+    return pd.Index(keys.values, dtype=object)
+
+def fingerprint_rows(sheet: pd.DataFrame) -> np.ndarray:
+    """
+    Generate a fingerprint for every row of a sheet.
+
+    Columns are converted to strings in bulk and each row is then hashed with generate_hash,
+    so two rows share a fingerprint exactly when all of their values read the same.
+
+    Args:
+        sheet (pd.DataFrame): DataFrame of the sheet.
+
+    Returns:
+        np.ndarray: One hash string per row, in row order.
+    """
+    strings = pd.DataFrame({i: column_as_strings(sheet.iloc[:, i]) for i in range(sheet.shape[1])}, index=sheet.index)
+    return np.array([generate_hash(row) for row in strings.itertuples(index=False, name=None)], dtype=object)
+
+def find_moved_rows(positions: np.ndarray) -> np.ndarray:
+    """
+    Flag the rows that changed their relative order.
+
+    Given the second-sheet positions of matched rows listed in first-sheet order, the
+    longest increasing subsequence is the largest set of rows that kept their order; every
+    other row is considered moved. Rows that merely shifted because of an insertion or
+    deletion elsewhere are therefore not flagged. Runs in O(n log n).
+
+    Args:
+        positions (np.ndarray): Second-sheet positions of the matched rows, in first-sheet order.
+
+    Returns:
+        np.ndarray: Boolean mask, True for rows that moved.
+    """
+    tails = []          # tails[k]: last position of the best increasing run of length k + 1
+    tail_index = []     # index into positions of each tail
+    previous = np.full(len(positions), -1, dtype=np.int64)
+    for i, pos in enumerate(positions):
+        k = bisect.bisect_left(tails, pos)
+        if k > 0:
+            previous[i] = tail_index[k - 1]
+        if k == len(tails):
+            tails.append(pos)
+            tail_index.append(i)
+        else:
+            tails[k] = pos
+            tail_index[k] = i
+
+    moved = np.ones(len(positions), dtype=bool)
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        moved[i] = False
+        i = previous[i]
+    return moved
+
+def pair_occurrences(keys1: pd.Series, keys2: pd.Series) -> np.ndarray:
+    """
+    Pair equal keys across two sequences, matching the k-th occurrence with the k-th occurrence.
+
+    Args:
+        keys1 (pd.Series): Keys of the first sequence.
+        keys2 (pd.Series): Keys of the second sequence.
+
+    Returns:
+        np.ndarray: For each entry of keys1, the position of its partner in keys2, or -1.
+    """
+    keys1 = keys1.astype(str).reset_index(drop=True)
+    keys2 = keys2.astype(str).reset_index(drop=True)
+    keys1 = keys1 + '#' + keys1.groupby(keys1).cumcount().astype(str)
+    keys2 = keys2 + '#' + keys2.groupby(keys2).cumcount().astype(str)
+    return pd.Index(keys2).get_indexer(keys1)
+
+def align_rows_by_key(keys1: pd.Index, keys2: pd.Index) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Align the rows of two sheets on their keys using a single hash join.
+
+    Args:
+        keys1 (pd.Index): Unique row keys of the first sheet.
+        keys2 (pd.Index): Unique row keys of the second sheet.
+
+    Returns:
+        Tuple: (pairs1, pairs2, deleted, added) positions, where pairs1[i] and pairs2[i] hold
+        the same key, deleted lists rows only in the first sheet and added rows only in the second.
+    """
+    indexer = keys2.get_indexer(keys1)
+    matched = indexer >= 0
+    pairs1 = np.nonzero(matched)[0]
+    pairs2 = indexer[matched]
+    deleted = np.nonzero(~matched)[0]
+    added = np.setdiff1d(np.arange(len(keys2)), pairs2)
+    return pairs1, pairs2, deleted, added
+
+def align_rows_by_fingerprint(fingerprints1: np.ndarray, fingerprints2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Align the rows of two sheets without keys, using their fingerprints.
+
+    Rows with identical fingerprints are paired first. Those that kept their relative order
+    act as anchors; the remaining rows are paired in order within each gap between two
+    anchors, so an inserted row no longer shifts every row after it out of alignment.
+
+    Args:
+        fingerprints1 (np.ndarray): Row fingerprints of the first sheet.
+        fingerprints2 (np.ndarray): Row fingerprints of the second sheet.
+
+    Returns:
+        Tuple: (pairs1, pairs2, deleted, added) positions, with pairs sorted by first-sheet
+        position, deleted listing unpaired rows of the first sheet and added those of the second.
+    """
+    indexer = pair_occurrences(pd.Series(fingerprints1, dtype=object), pd.Series(fingerprints2, dtype=object))
+    matched1 = np.nonzero(indexer >= 0)[0]
+    matched2 = indexer[matched1]
+
+    in_order = ~find_moved_rows(matched2)
+    anchors1 = matched1[in_order]
+    anchors2 = matched2[in_order]
+
+    # Pair the leftover rows by (gap between anchors, rank within the gap)
+    unmatched1 = np.setdiff1d(np.arange(len(fingerprints1)), matched1)
+    unmatched2 = np.setdiff1d(np.arange(len(fingerprints2)), matched2)
+    gap1 = pd.Series(np.searchsorted(anchors1, unmatched1))
+    gap2 = pd.Series(np.searchsorted(anchors2, unmatched2))
+    slot1 = gap1.astype(str) + ':' + gap1.groupby(gap1).cumcount().astype(str)
+    slot2 = gap2.astype(str) + ':' + gap2.groupby(gap2).cumcount().astype(str)
+    gap_indexer = pd.Index(slot2).get_indexer(slot1)
+    gap_paired = gap_indexer >= 0
+
+    pairs1 = np.concatenate([matched1, unmatched1[gap_paired]])
+    pairs2 = np.concatenate([matched2, unmatched2[gap_indexer[gap_paired]]])
+    order = np.argsort(pairs1, kind='stable')
+
+    deleted = unmatched1[~gap_paired]
+    added = np.setdiff1d(unmatched2, unmatched2[gap_indexer[gap_paired]])
+    return pairs1[order], pairs2[order], deleted, added
+
+def summarize_row(row: pd.Series) -> str:
+    """
+    Render the non-empty values of a row as a single string for row-level results.
+
+    Args:
+        row (pd.Series): The row to summarize.
+
+    Returns:
+        str: The row's non-empty values joined with ' | '.
+    """
+    return ' | '.join(str(v) for v in row.values if not pd.isna(v))
+
+def compare_unmatched_rows(rows: pd.DataFrame, sheet_name: str, row_numbers: Dict[str, int], function_details: Dict[str, Dict[str, str]], source: str) -> List[Tuple]:
+    """
+    Build row-level results for rows that exist in only one of the sheets.
+
+    Args:
+        rows (pd.DataFrame): Rows (indexed by key) present in only one sheet.
+        sheet_name (str): Name of the sheet being compared.
+        row_numbers (Dict[str, int]): Key to Excel row number for the sheet the rows came from.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        source (str): 'source1' if the rows were deleted, 'source2' if they were added.
+
+    Returns:
+        List[Tuple]: List of comparison results.
+    """
+    results = []
+    for key, row in rows.iterrows():
+        function_name = function_details.get(key, {}).get('name', '')
+        owner = function_details.get(key, {}).get('owner', '')
+        cell = f"Row {row_numbers[key]}"
+        if source == 'source1':
+            results.append((key, function_name, owner, sheet_name, cell, summarize_row(row), '', '', 'Row deleted'))
+        else:
+            results.append((key, function_name, owner, sheet_name, '', '', cell, summarize_row(row), 'Row added'))
+    return results
+
+def compare_moved_rows(rows: pd.DataFrame, sheet_name: str, rows1: Dict[str, int], rows2: Dict[str, int], function_details: Dict[str, Dict[str, str]]) -> List[Tuple]:
+    """
+    Build row-level results for rows whose content is unchanged but whose position moved.
+
+    Args:
+        rows (pd.DataFrame): The moved rows (indexed by key), as found in the first sheet.
+        sheet_name (str): Name of the sheet being compared.
+        rows1 (Dict[str, int]): Key to Excel row number in the first sheet.
+        rows2 (Dict[str, int]): Key to Excel row number in the second sheet.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+
+    Returns:
+        List[Tuple]: List of comparison results.
+    """
+    results = []
+    for key, row in rows.iterrows():
+        function_name = function_details.get(key, {}).get('name', '')
+        owner = function_details.get(key, {}).get('owner', '')
+        summary = summarize_row(row)
+        results.append((key, function_name, owner, sheet_name, f"Row {rows1[key]}", summary, f"Row {rows2[key]}", summary, 'Moved with no change'))
+    return results
+
+def match_renamed_columns(dropped: pd.DataFrame, added: pd.DataFrame) -> Dict[str, str]:
+    """
+    Pair dropped and added columns whose contents match, treating each pair as a rename.
+
+    A column's content fingerprint is the set of its distinct non-empty values, so a renamed
+    column still matches after rows were inserted, deleted or reordered. Pairs are taken
+    greedily by descending overlap (Jaccard similarity) down to RENAME_SIMILARITY.
+
+    Args:
+        dropped (pd.DataFrame): Columns of the first sheet missing from the second.
+        added (pd.DataFrame): Columns of the second sheet missing from the first.
+
+    Returns:
+        Dict[str, str]: Added column name to the dropped column name it renames.
+    """
+    values1 = {col: set(column_as_strings(dropped[col].dropna())) for col in dropped.columns}
+    values2 = {col: set(column_as_strings(added[col].dropna())) for col in added.columns}
+    scores = sorted(
+        ((len(v1 & v2) / len(v1 | v2), col1, col2) for col1, v1 in values1.items() for col2, v2 in values2.items() if v1 and v2),
+        key=lambda score: score[0], reverse=True
+    )
+
+    renames = {}
+    for score, col1, col2 in scores:
+        if score < RENAME_SIMILARITY:
+            break
+        if col2 not in renames and col1 not in renames.values():
+            renames[col2] = col1
+    return renames
+
+def align_columns(sheet1: pd.DataFrame, sheet2: pd.DataFrame, sheet_name: str, detect_renames: bool = False) -> Tuple[Dict[str, str], List[Tuple]]:
+    """
+    Align the columns of two sheets by name and report schema changes once per column.
+
+    Columns found in only one sheet are reported as 'Column deleted' or 'Column added' rather
+    than cell by cell. With detect_renames, such columns are first paired by content and
+    reported as 'Column renamed'. Shared columns that changed their relative order are
+    reported as 'Column moved'.
+
+    Args:
+        sheet1 (pd.DataFrame): DataFrame of the first sheet.
+        sheet2 (pd.DataFrame): DataFrame of the second sheet.
+        sheet_name (str): Name of the sheet being compared.
+        detect_renames (bool): Whether to match dropped and added columns by content.
+
+    Returns:
+        Tuple[Dict[str, str], List[Tuple]]: Renamed second-sheet column to its first-sheet name, and the column-level results.
+    """
+    from openpyxl.utils import get_column_letter
+
+    columns1 = list(sheet1.columns)
+    columns2 = list(sheet2.columns)
+    if columns1 == columns2:
+        return {}, []
+
+    letters1 = {col: get_column_letter(i + 1) for i, col in enumerate(columns1)}
+    letters2 = {col: get_column_letter(i + 1) for i, col in enumerate(columns2)}
+    dropped = [col for col in columns1 if col not in letters2]
+    added = [col for col in columns2 if col not in letters1]
+    renames = match_renamed_columns(sheet1[dropped], sheet2[added]) if detect_renames and dropped and added else {}
+    renamed_from = {old: new for new, old in renames.items()}
+
+    results = []
+    for col in dropped:
+        if col in renamed_from:
+            new = renamed_from[col]
+            results.append(('', '', '', sheet_name, f"Column {letters1[col]}", col, f"Column {letters2[new]}", new, 'Column renamed'))
+        else:
+            results.append(('', '', '', sheet_name, f"Column {letters1[col]}", col, '', '', 'Column deleted'))
+    for col in added:
+        if col not in renames:
+            results.append(('', '', '', sheet_name, '', '', f"Column {letters2[col]}", col, 'Column added'))
+
+    # Shared columns out of their relative order, by the same longest-increasing-run rule as rows
+    shared = [col for col in columns1 if col in letters2]
+    moved = find_moved_rows(np.array([columns2.index(col) for col in shared], dtype=np.int64))
+    for col in np.array(shared, dtype=object)[moved]:
+        results.append(('', '', '', sheet_name, f"Column {letters1[col]}", col, f"Column {letters2[col]}", col, 'Column moved'))
+
+    return renames, results
+
+def align_sheets(sheet1: pd.DataFrame, sheet2: pd.DataFrame, sheet_name: str, function_details: Dict[str, Dict[str, str]], key_columns: Optional[List[str]] = None, include_unchanged: bool = False, fingerprints1: Optional[np.ndarray] = None, fingerprints2: Optional[np.ndarray] = None, detect_renames: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int], Dict[str, int], List[Tuple]]:
+    """
+    Align the columns and rows of two sheets and pick out the rows that need a cell-by-cell comparison.
+
+    Columns are aligned first (see align_columns). Every row is then fingerprinted over the
+    shared columns and rows are aligned either by key (when key columns are given and
+    present in both sheets) or by fingerprint. Identical rows that changed their relative
+    order are reported as 'Moved with no change', and rows without a partner are reported
+    as whole rows added or deleted.
+
+    Args:
+        sheet1 (pd.DataFrame): DataFrame of the first sheet.
+        sheet2 (pd.DataFrame): DataFrame of the second sheet.
+        sheet_name (str): Name of the sheet being compared.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        key_columns (Optional[List[str]]): Columns identifying a row; None aligns rows by fingerprint.
+        include_unchanged (bool): Whether identical rows should still be compared cell by cell.
+        fingerprints1 (Optional[np.ndarray]): Precomputed row fingerprints of the first sheet.
+        fingerprints2 (Optional[np.ndarray]): Precomputed row fingerprints of the second sheet.
+        detect_renames (bool): Whether to match dropped and added columns by content.
+
+    Returns:
+        Tuple: (matched1, matched2, rows1, rows2, row_results) where matched1 and matched2 hold
+        the paired rows to compare under a shared label, rows1/rows2 map those labels to their
+        Excel row numbers and row_results holds the column- and row-level results.
+    """
+    renames, column_results = align_columns(sheet1, sheet2, sheet_name, detect_renames)
+    if column_results:
+        # Renamed columns take their first-sheet name; positions, and so cell letters, are kept.
+        # Whole-row fingerprints no longer match across different schemas, so rows are
+        # fingerprinted again over the shared columns only.
+        sheet2 = sheet2.rename(columns=renames)
+        shared = sheet1.columns.intersection(sheet2.columns, sort=False)
+        fingerprints1 = fingerprint_rows(sheet1[shared])
+        fingerprints2 = fingerprint_rows(sheet2[shared])
+    if fingerprints1 is None:
+        fingerprints1 = fingerprint_rows(sheet1)
+    if fingerprints2 is None:
+        fingerprints2 = fingerprint_rows(sheet2)
+
+    if key_columns:
+        missing = [col for col in key_columns if col not in sheet1.columns or col not in sheet2.columns]
+        if missing:
+            logger.warning(f"Sheet '{sheet_name}' lacks key column(s) {', '.join(missing)}; aligning rows by fingerprint.")
+            key_columns = None
+
+    if key_columns:
+        labels1 = build_row_keys(sheet1, key_columns)
+        labels2 = build_row_keys(sheet2, key_columns)
+        pairs1, pairs2, deleted, added = align_rows_by_key(labels1, labels2)
+    else:
+        # Without keys, rows are labelled by their position in their own sheet
+        labels1 = pd.Index(np.arange(len(sheet1)).astype(str), dtype=object)
+        labels2 = pd.Index(np.arange(len(sheet2)).astype(str), dtype=object)
+        pairs1, pairs2, deleted, added = align_rows_by_fingerprint(fingerprints1, fingerprints2)
+
+    # Row 1 holds the headers, so data row N sits on Excel row N + 2
+    rows1 = dict(zip(labels1, range(2, len(labels1) + 2)))
+    rows2 = dict(zip(labels2, range(2, len(labels2) + 2)))
+
+    same = fingerprints1[pairs1] == fingerprints2[pairs2]
+    moved = same & find_moved_rows(pairs2)
+    changed = ~moved if include_unchanged else ~same
+
+    # Paired rows share the first sheet's label so compare_chunks lines them up
+    labels = labels1[pairs1[changed]]
+    pair_rows1 = {label: rows1[label] for label in labels}
+    pair_rows2 = dict(zip(labels, (rows2[label] for label in labels2[pairs2[changed]])))
+    matched1 = sheet1.iloc[pairs1[changed]].set_axis(labels)
+    matched2 = sheet2.iloc[pairs2[changed]].set_axis(labels)
+
+    row_results = column_results
+    moved_labels = labels1[pairs1[moved]]
+    moved_rows2 = dict(zip(moved_labels, (rows2[label] for label in labels2[pairs2[moved]])))
+    row_results.extend(compare_moved_rows(sheet1.iloc[pairs1[moved]].set_axis(moved_labels), sheet_name, rows1, moved_rows2, function_details))
+    row_results.extend(compare_unmatched_rows(sheet1.iloc[deleted].set_axis(labels1[deleted]), sheet_name, rows1, function_details, 'source1'))
+    row_results.extend(compare_unmatched_rows(sheet2.iloc[added].set_axis(labels2[added]), sheet_name, rows2, function_details, 'source2'))
+
+    return matched1, matched2, pair_rows1, pair_rows2, row_results
+
+def compare_sheets(sheet1: pd.DataFrame, sheet2: pd.DataFrame, sheet_name: str, minor_threshold: float, major_threshold: float, chunk_size: int, function_details: Dict[str, Dict[str, str]], key_columns: Optional[List[str]] = None, include_unchanged: bool = False, fingerprints1: Optional[np.ndarray] = None, fingerprints2: Optional[np.ndarray] = None, scorer: str = 'sequencematcher', detect_renames: bool = False) -> List[Tuple]:
+    """
+    Compare two sheets and return the comparison results.
+
+    Rows are aligned with align_sheets and only aligned rows whose fingerprints differ are
+    compared cell by cell, one chunk at a time. Row-level results follow the cell results.
+
+    Args:
+        sheet1 (pd.DataFrame): DataFrame of the first sheet.
+        sheet2 (pd.DataFrame): DataFrame of the second sheet.
+        sheet_name (str): Name of the sheet being compared.
+        minor_threshold (float): Threshold for minor changes.
+        major_threshold (float): Threshold for major changes.
+        chunk_size (int): Number of rows to process at a time.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        key_columns (Optional[List[str]]): Columns identifying a row; None aligns rows by fingerprint.
+        include_unchanged (bool): Whether to emit 'No change' results for identical cells.
+        fingerprints1 (Optional[np.ndarray]): Precomputed row fingerprints of the first sheet.
+        fingerprints2 (Optional[np.ndarray]): Precomputed row fingerprints of the second sheet.
+        scorer (str): Name of the similarity scorer in SCORERS.
+        detect_renames (bool): Whether to report dropped and added columns with matching contents as renames.
+
+    Returns:
+        List[Tuple]: List of comparison results.
+    """
+    results = []
+    matched1, matched2, rows1, rows2, row_results = align_sheets(sheet1, sheet2, sheet_name, function_details, key_columns, include_unchanged, fingerprints1, fingerprints2, detect_renames)
+    
+    # Process the sheets in chunks
+    for start in range(0, len(matched1), chunk_size):
+        end = start + chunk_size
+        chunk1 = matched1.iloc[start:end]
+        chunk2 = matched2.iloc[start:end]
+        
+        chunk_results = compare_chunks(chunk1, chunk2, sheet_name, minor_threshold, major_threshold, function_details, rows1, rows2, include_unchanged, scorer)
+        results.extend(chunk_results)
+
+    results.extend(row_results)
+    return results
+
+def get_cache_key(file_path: str, sheet_name: str, read_mode: str = 'values', expand_merged: bool = False) -> str:
+    """
+    Build the cache key for a sheet from the file's path, modification time and size.
+
+    Args:
+        file_path (str): Path to the Excel file.
+        sheet_name (str): Name of the sheet.
+        read_mode (str): How cells were read (see iter_sheet_rows).
+        expand_merged (bool): Whether merged ranges were filled in.
+
+    Returns:
+        str: A hash string identifying this version of the sheet.
+    """
+    stat = os.stat(file_path)
+    key = [os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, sheet_name]
+    if read_mode != 'values':
+        key.append(read_mode)
+    if expand_merged:
+        key.append('merged')
+    return generate_hash(key)
+
+# File extensions of a cache or state entry: the sheet as Feather and its fingerprints as NumPy.
+# '.pkl' entries were written by earlier versions and are only ever deleted, never loaded.
+CACHE_EXTENSIONS = ('.feather', '.npy', '.pkl')
+
+def evict_cache(cache_dir: str, max_bytes: int) -> None:
+    """
+    Delete the least recently used cache entries until the cache fits in max_bytes.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        max_bytes (int): Maximum total size of the cache in bytes.
+    """
+    # An entry is all the files sharing a cache key
+    entries = collections.defaultdict(lambda: [0.0, 0, []])
+    for name in os.listdir(cache_dir):
+        stem, extension = os.path.splitext(name)
+        if extension in CACHE_EXTENSIONS:
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = entries[stem]
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(path)
+
+    total = sum(size for _, size, _ in entries.values())
+    for _, size, paths in sorted(entries.values()):
+        if total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+                logger.debug(f"Evicted cache entry {path}")
+            except OSError:
+                pass
+        total -= size
+
+def encode_value(value) -> str:
+    """
+    Encode a cell of an object column as JSON tagged with its type, so it reads back unchanged.
+
+    Object columns hold whatever mix of values the sheet had (numbers next to text, dates,
+    empty cells), which a typed Arrow column cannot represent.
+
+    Args:
+        value: The cell value.
+
+    Returns:
+        str: The tagged value as JSON.
+
+    Raises:
+        TypeError: If the value is of a type that cannot be stored.
+    """
+    if value is None:
+        tagged = None
+    elif value is pd.NaT:
+        tagged = ['NaT', None]
+    elif value is pd.NA:
+        tagged = ['NA', None]
+    elif isinstance(value, (bool, np.bool_)):
+        tagged = ['b', bool(value)]
+    elif isinstance(value, (int, np.integer)):
+        tagged = ['i', int(value)]
+    elif isinstance(value, (float, np.floating)):
+        tagged = ['f', float(value)]
+    elif isinstance(value, str):
+        tagged = ['s', value]
+    elif isinstance(value, pd.Timestamp):
+        tagged = ['T', value.isoformat()]
+    elif isinstance(value, datetime.datetime):
+        tagged = ['dt', value.isoformat()]
+    elif isinstance(value, datetime.date):
+        tagged = ['d', value.isoformat()]
+    elif isinstance(value, datetime.time):
+        tagged = ['t', value.isoformat()]
+    elif isinstance(value, datetime.timedelta):
+        tagged = ['td', [value.days, value.seconds, value.microseconds]]
+    else:
+        raise TypeError(f"Cannot store a {type(value).__name__} value")
+    return json.dumps(tagged)
+
+# Rebuild a cell from the type tag and payload written by encode_value
+VALUE_DECODERS = {
+    'NaT': lambda payload: pd.NaT,
+    'NA': lambda payload: pd.NA,
+    'b': bool,
+    'i': int,
+    'f': float,
+    's': str,
+    'T': pd.Timestamp,
+    'dt': datetime.datetime.fromisoformat,
+    'd': datetime.date.fromisoformat,
+    't': datetime.time.fromisoformat,
+    'td': lambda payload: datetime.timedelta(*payload),
+}
+
+def decode_value(text: str):
+    """
+    Decode a cell encoded by encode_value.
+    """
+    tagged = json.loads(text)
+    return None if tagged is None else VALUE_DECODERS[tagged[0]](tagged[1])
+
+def read_cache_entry(cache_path: str) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Read a cached sheet and its fingerprints, refreshing the entry's timestamp for LRU eviction.
+
+    The sheet is read from Feather and the fingerprints from a NumPy file loaded without
+    pickle support, so reading an entry never runs code stored in the cache directory.
+
+    Args:
+        cache_path (str): Path of the cache entry, without extension.
+
+    Returns:
+        Optional[Tuple[pd.DataFrame, np.ndarray]]: The sheet and its fingerprints, or None on a miss.
+    """
+    try:
+        from pyarrow import feather
+
+        table = feather.read_table(f"{cache_path}.feather")
+        with open(f"{cache_path}.npy", 'rb') as f:
+            fingerprints = np.load(f, allow_pickle=False)
+        layout = json.loads(table.schema.metadata[b'compare_layout'])
+
+        frame = table.to_pandas()
+        for position in layout['encoded']:
+            frame[str(position)] = pd.Series([decode_value(text) for text in frame[str(position)]], index=frame.index, dtype=object)
+        frame.columns = pd.Index([decode_value(text) for text in layout['columns']])
+        if 'index' in layout:
+            frame.index = pd.Index([decode_value(text) for text in layout['index']])
+        else:
+            frame.index = pd.RangeIndex(*layout['range'])
+
+        for extension in ('.feather', '.npy'):
+            os.utime(f"{cache_path}{extension}")
+        return frame, np.array(fingerprints.tolist(), dtype=object)
+    except (OSError, ValueError, KeyError, TypeError, ImportError):
+        return None
+
+def write_cache_entry(cache_path: str, sheet: pd.DataFrame, fingerprints: np.ndarray, cache_size_mb: Optional[int]) -> None:
+    """
+    Store a parsed sheet as Feather and its fingerprints as NumPy, then evict old entries beyond the size limit.
+
+    Columns are stored under their positions; their names, the row index and the object
+    columns go through encode_value, so the sheet reads back with the same values and dtypes.
+
+    Args:
+        cache_path (str): Path of the cache entry, without extension.
+        sheet (pd.DataFrame): The parsed sheet.
+        fingerprints (np.ndarray): The sheet's row fingerprints.
+        cache_size_mb (Optional[int]): Maximum size of the cache directory in megabytes; None never evicts.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to temporary files first so concurrent workers never read a partial entry
+    tmp_paths = {extension: f"{cache_path}{extension}.{os.getpid()}.tmp" for extension in ('.npy', '.feather')}
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+
+        layout = {'columns': [encode_value(name) for name in sheet.columns], 'encoded': []}
+        if isinstance(sheet.index, pd.RangeIndex):
+            layout['range'] = [sheet.index.start, sheet.index.stop, sheet.index.step]
+        else:
+            layout['index'] = [encode_value(label) for label in sheet.index]
+        columns = {}
+        for position in range(sheet.shape[1]):
+            column = sheet.iloc[:, position].reset_index(drop=True)
+            if column.dtype == object:
+                column = column.map(encode_value).astype(object)
+                layout['encoded'].append(position)
+            columns[str(position)] = column
+        table = pa.Table.from_pandas(pd.DataFrame(columns, index=pd.RangeIndex(len(sheet))), preserve_index=False)
+        table = table.replace_schema_metadata({**table.schema.metadata, b'compare_layout': json.dumps(layout).encode()})
+
+        with open(tmp_paths['.npy'], 'wb') as f:
+            np.save(f, np.array(fingerprints.tolist(), dtype=str), allow_pickle=False)
+        feather.write_feather(table, tmp_paths['.feather'])
+        for extension, tmp_path in tmp_paths.items():
+            os.replace(tmp_path, f"{cache_path}{extension}")
+        if cache_size_mb is not None:
+            evict_cache(cache_dir, cache_size_mb * 1024 * 1024)
+    except (OSError, ValueError, TypeError, NotImplementedError, ImportError) as e:
+        logger.warning(f"Could not write cache entry {cache_path}: {e}")
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def list_sheet_names(file_path: str) -> List[str]:
+    """
+    List the sheets of a workbook by reading its manifest, without parsing any sheet data.
+
+    Args:
+        file_path (str): Path to the Excel file.
+
+    Returns:
+        List[str]: Sheet names in workbook order.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    return [element.get('name') for element in root.iter() if element.tag.endswith('}sheet')]
+
+def read_merged_ranges(file_path: str, sheet_names: List[str]) -> Dict[str, List[Tuple[int, int, int, int]]]:
+    """
+    Read the merged ranges of sheets straight from the workbook's XML, without loading the workbook.
+
+    The <mergeCells> block follows the cell data, so each sheet's XML is scanned as raw bytes
+    up to it and only that block is parsed.
+
+    Args:
+        file_path (str): Path to the Excel file.
+        sheet_names (List[str]): Sheets to read.
+
+    Returns:
+        Dict[str, List[Tuple[int, int, int, int]]]: Sheet name to its merged ranges as (min_col, min_row, max_col, max_row).
+    """
+    from openpyxl.utils import range_boundaries
+
+    ranges = {}
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {element.get('Id'): element.get('Target') for element in relationships}
+        for element in workbook.iter():
+            if not element.tag.endswith('}sheet') or element.get('name') not in sheet_names:
+                continue
+            relationship = next(value for key, value in element.attrib.items() if key.endswith('}id'))
+            target = targets[relationship]
+            path = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+
+            block = b''
+            with archive.open(path) as f:
+                tail = b''
+                while True:
+                    data = f.read(1 << 20)
+                    if not data:
+                        break
+                    data = tail + data
+                    start = data.find(b'mergeCells')
+                    if start >= 0:
+                        block = data[start:] + f.read()
+                        break
+                    tail = data[-len(b'mergeCells'):]
+            refs = re.findall(rb'<(?:\w+:)?mergeCell\b[^>]*\bref="([^"]+)"', block)
+            ranges[element.get('name')] = [range_boundaries(ref.decode()) for ref in refs]
+    return ranges
+
+def open_workbooks(file_path: str, read_mode: str = 'values') -> List:
+    """
+    Open a workbook in openpyxl's read-only mode once for a read mode.
+
+    'both' needs two passes over the file, so it opens the formulas and the cached values
+    side by side. The caller closes the workbooks (see close_workbooks).
+
+    Args:
+        file_path (str): Path to the Excel file.
+        read_mode (str): 'values', 'formulas' or 'both'.
+
+    Returns:
+        List: The opened workbooks, formulas first in 'both' mode.
+    """
+    import openpyxl
+
+    data_only = {'values': [True], 'formulas': [False], 'both': [False, True]}[read_mode]
+    return [openpyxl.load_workbook(file_path, read_only=True, data_only=flag) for flag in data_only]
+
+def close_workbooks(workbooks: List) -> None:
+    """
+    Close workbooks opened by open_workbooks, releasing their archives.
+    """
+    for workbook in workbooks:
+        workbook.close()
+
+def iter_sheet_rows(workbooks: List, sheet_name: str, read_mode: str = 'values') -> Iterator[Tuple]:
+    """
+    Stream the rows of a sheet, header row first, from workbooks opened by open_workbooks.
+
+    Only the row being read is held in memory. In 'values' mode cells hold their cached
+    values, in 'formulas' mode formula cells hold their formula text (e.g. '=SUM(A1:A3)'),
+    and in 'both' mode formula cells hold their formula followed by the cached value in
+    brackets, so a change to either is picked up.
+
+    Args:
+        workbooks (List): The workbook opened for read_mode (see open_workbooks).
+        sheet_name (str): Name of the sheet.
+        read_mode (str): 'values', 'formulas' or 'both'.
+
+    Yields:
+        Tuple: The values of one row.
+    """
+    streams = [workbook[sheet_name].iter_rows(values_only=True) for workbook in workbooks]
+    if read_mode != 'both':
+        yield from streams[0]
+    else:
+        for formulas, values in zip(*streams):
+            yield tuple(f"{f} [{v}]" if isinstance(f, str) and f.startswith('=') else v for f, v in zip(formulas, values))
+
+def header_names(header: Tuple) -> List:
+    """
+    Turn a header row into unique column names the way pandas does ('Unnamed: 3', 'Name.1').
+
+    Args:
+        header (Tuple): The values of the header row.
+
+    Returns:
+        List: One column name per header cell.
+    """
+    names = []
+    seen = collections.Counter()
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else name
+        names.append(f"{name}.{seen[name]}" if seen[name] else name)
+        seen[name] += 1
+    return names
+
+def read_sheet(workbooks: List, sheet_name: str, read_mode: str) -> pd.DataFrame:
+    """
+    Read a sheet into a DataFrame through iter_sheet_rows, for the read modes pandas cannot provide.
+
+    Args:
+        workbooks (List): The workbook opened for read_mode (see open_workbooks).
+        sheet_name (str): Name of the sheet.
+        read_mode (str): 'values', 'formulas' or 'both'.
+
+    Returns:
+        pd.DataFrame: The sheet, with the first row as its header and trailing empty rows dropped.
+    """
+    rows = iter_sheet_rows(workbooks, sheet_name, read_mode)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    data = list(rows)
+    while data and all(value is None for value in data[-1]):
+        data.pop()
+    return pd.DataFrame(data, columns=header_names(header))
+
+def load_workbook_sheets(args) -> Dict[str, Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Load several sheets of one workbook together with their row fingerprints.
+
+    The workbook is opened once, so its archive and shared strings table are parsed a single
+    time no matter how many sheets are read. Sheets found in the cache skip parsing entirely.
+
+    Args:
+        args: Tuple containing (file_path, sheet_names, cache_dir, cache_size_mb, read_mode, expand_merged)
+
+    Returns:
+        Dict[str, Tuple[pd.DataFrame, np.ndarray]]: Sheet name to (sheet, fingerprints).
+    """
+    file_path, sheet_names, cache_dir, cache_size_mb, read_mode, expand_merged = args
+    loaded = {}
+    to_parse = []
+
+    for sheet_name in sheet_names:
+        entry = read_cache_entry(os.path.join(cache_dir, get_cache_key(file_path, sheet_name, read_mode, expand_merged))) if cache_dir else None
+        if entry is not None:
+            logger.debug(f"Cache hit for '{sheet_name}' in {file_path}")
+            worker_counters['parse_cache_hits'] += 1
+            loaded[sheet_name] = entry
+        else:
+            if cache_dir:
+                worker_counters['parse_cache_misses'] += 1
+            to_parse.append(sheet_name)
+
+    if not to_parse:
+        return loaded
+
+    merged_ranges = read_merged_ranges(file_path, to_parse) if expand_merged else {}
+
+    # Cached values go through pandas; formulas need openpyxl, one streamed sheet at a time.
+    # Either way the workbook is opened once for all the sheets of the job
+    with contextlib.ExitStack() as stack:
+        excel_file = stack.enter_context(pd.ExcelFile(file_path)) if read_mode == 'values' else None
+        workbooks = open_workbooks(file_path, read_mode) if read_mode != 'values' else []
+        stack.callback(close_workbooks, workbooks)
+        for sheet_name in to_parse:
+            try:
+                sheet = excel_file.parse(sheet_name) if read_mode == 'values' else read_sheet(workbooks, sheet_name, read_mode)
+            except Exception as e:
+                logger.error(f"Error reading sheet {sheet_name} from {file_path}: {e}")
+                continue
+            if merged_ranges.get(sheet_name):
+                sheet = expand_merged_cells(sheet, merged_ranges[sheet_name])
+            fingerprints = fingerprint_rows(sheet)
+            worker_counters['rows_parsed'] += len(sheet)
+            loaded[sheet_name] = (sheet, fingerprints)
+            if cache_dir:
+                write_cache_entry(os.path.join(cache_dir, get_cache_key(file_path, sheet_name, read_mode, expand_merged)), sheet, fingerprints, cache_size_mb)
+
+    return loaded
+
+def read_snapshot_manifest(state_dir: str) -> Optional[dict]:
+    """
+    Read the manifest of the snapshot stored in an incremental state directory.
+
+    Args:
+        state_dir (str): The state directory.
+
+    Returns:
+        Optional[dict]: The manifest with the snapshot's source path, mtime and sheet files, or None if no snapshot is stored.
+    """
+    try:
+        with open(os.path.join(state_dir, SNAPSHOT_MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_snapshot_state(state_dir: str) -> Tuple[Optional[dict], Dict[str, Tuple[pd.DataFrame, np.ndarray]]]:
+    """
+    Load the parsed sheets and fingerprints of the snapshot stored in an incremental state directory.
+
+    Args:
+        state_dir (str): The state directory.
+
+    Returns:
+        Tuple[Optional[dict], Dict[str, Tuple[pd.DataFrame, np.ndarray]]]: The manifest (None if no snapshot is stored)
+        and the sheet name to (sheet, fingerprints) mapping, in the same form as load_workbook_sheets.
+
+    Raises:
+        ValueError: If the snapshot was stored by a version that pickled its sheets.
+    """
+    manifest = read_snapshot_manifest(state_dir)
+    if manifest is None:
+        return None, {}
+
+    if any(file_name.endswith('.pkl') for file_name in manifest['sheets'].values()):
+        raise ValueError(f"The snapshot in {state_dir} was stored in an older format; remove the directory to record a new baseline.")
+
+    loaded = {}
+    for sheet_name, file_name in manifest['sheets'].items():
+        entry = read_cache_entry(os.path.join(state_dir, file_name))
+        if entry is None:
+            logger.warning(f"Stored state for sheet '{sheet_name}' is missing from {state_dir}; the sheet is skipped.")
+            continue
+        loaded[sheet_name] = entry
+    return manifest, loaded
+
+def save_snapshot_state(state_dir: str, file_path: str, loaded: Dict[str, Tuple[pd.DataFrame, np.ndarray]], read_mode: str = 'values', expand_merged: bool = False) -> None:
+    """
+    Store a snapshot's parsed sheets and fingerprints as the baseline for the next incremental run.
+
+    The manifest is replaced last, so an interrupted run leaves the previous snapshot in place.
+
+    Args:
+        state_dir (str): The state directory.
+        file_path (str): Path of the snapshot's Excel file.
+        loaded (Dict[str, Tuple[pd.DataFrame, np.ndarray]]): Sheet name to (sheet, fingerprints).
+        read_mode (str): How the sheets' cells were read (see iter_sheet_rows).
+        expand_merged (bool): Whether merged ranges were filled in.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    sheets = {}
+    for sheet_name, (sheet, fingerprints) in loaded.items():
+        file_name = get_cache_key(file_path, sheet_name)
+        write_cache_entry(os.path.join(state_dir, file_name), sheet, fingerprints, None)
+        sheets[sheet_name] = file_name
+
+    manifest = {'source': os.path.abspath(file_path), 'mtime': os.path.getmtime(file_path), 'read_mode': read_mode, 'expand_merged': expand_merged, 'sheets': sheets}
+    manifest_path = os.path.join(state_dir, SNAPSHOT_MANIFEST)
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    # Drop the sheets of older snapshots
+    for name in os.listdir(state_dir):
+        stem, extension = os.path.splitext(name)
+        if extension in CACHE_EXTENSIONS and stem not in sheets.values():
+            os.remove(os.path.join(state_dir, name))
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of the current process in megabytes, or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def init_worker(log_level: int) -> None:
+    """
+    Initialize a pool worker: apply the parent's log level and nothing else.
+
+    Heavy modules are left to be imported by the first task that needs them.
+
+    Args:
+        log_level (int): Level of the parent's logger.
+    """
+    logger.setLevel(log_level)
+
+def run_instrumented(args):
+    """
+    Run a worker function and measure it.
+
+    Records the task's wall time, the process's peak RSS, the worker_counters and similarity
+    cache activity the task added, and, when a profile directory is given, accumulates the
+    task into the worker's cProfile dump (one file per worker process).
+
+    Args:
+        args: Tuple containing (function, function_args, cprofile_dir)
+
+    Returns:
+        Tuple: (result, stats) where result is the function's return value and stats a dict of measurements.
+    """
+    global worker_profiler
+    function, function_args, cprofile_dir = args
+    counters_before = worker_counters.copy()
+    cache_before = cached_similarity.cache_info()
+
+    if cprofile_dir:
+        if worker_profiler is None:
+            worker_profiler = cProfile.Profile()
+        worker_profiler.enable()
+    start = time.perf_counter()
+    try:
+        result = function(function_args)
+    finally:
+        seconds = time.perf_counter() - start
+        if cprofile_dir:
+            worker_profiler.disable()
+            worker_profiler.dump_stats(os.path.join(cprofile_dir, f"worker_{os.getpid()}.prof"))
+
+    cache_after = cached_similarity.cache_info()
+    stats = {
+        'function': function.__name__,
+        'pid': os.getpid(),
+        'seconds': seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'similarity_cache_hits': cache_after.hits - cache_before.hits,
+        'similarity_cache_misses': cache_after.misses - cache_before.misses,
+    }
+    stats.update(worker_counters - counters_before)
+    return result, stats
 
-def unmerge_cells(worksheet: openpyxl.worksheet.worksheet.Worksheet) -> None:
+def process_sheet(args):
     """
-    Unmerge all merged cells in the worksheet and copy the merged value to each cell.
-    
+    Align a single sheet for comparison.
+
     Args:
-        worksheet (openpyxl.worksheet.worksheet.Worksheet): The worksheet to process.
+        args: Tuple containing (sheet_name, sheet1, sheet2, fingerprints1, fingerprints2, function_details, key_columns, include_unchanged, detect_renames)
+
+    Returns:
+        Tuple: (sheet_name, matched1, matched2, rows1, rows2, row_results)
     """
+    sheet_name, sheet1, sheet2, fingerprints1, fingerprints2, function_details, key_columns, include_unchanged, detect_renames = args
     try:
-        # Get all merged cell ranges
-        merged_ranges = list(worksheet.merged_cells.ranges)
-        for merged_range in merged_ranges:
-            # Unmerge the cells
-            worksheet.unmerge_cells(str(merged_range))
-            # Get the value from the top-left cell of the merged range
-            value = worksheet.cell(merged_range.min_row, merged_range.min_col).value
-            # Copy the value to all cells in the previously merged range
-            for row in range(merged_range.min_row, merged_range.max_row + 1):
-                for col in range(merged_range.min_col, merged_range.max_col + 1):
-                    worksheet.cell(row, col, value)
+        return (sheet_name, *align_sheets(sheet1, sheet2, sheet_name, function_details, key_columns, include_unchanged, fingerprints1, fingerprints2, detect_renames))
     except Exception as e:
-        logger.error(f"Error in unmerging cells: {e}")
-        raise
+        logger.error(f"Error processing sheet {sheet_name}: {e}")
+        return sheet_name, pd.DataFrame(), pd.DataFrame(), {}, {}, []
 
-def get_function_details(workbook: openpyxl.workbook.workbook.Workbook, sheet_name: str, key_column: str) -> Dict[str, Dict[str, str]]:
+def process_chunk(args):
     """
-    Extract function details from the specified sheet.
-    
+    Compare one row range of an aligned sheet and spill its results to disk.
+
     Args:
-        workbook (openpyxl.workbook.workbook.Workbook): The workbook containing the function details.
-        sheet_name (str): The name of the sheet containing function details.
-        key_column (str): The name of the column containing the function IDs.
-    
+        args: Tuple containing (sheet_name, chunk1, chunk2, rows1, rows2, minor_threshold, major_threshold, function_details, include_unchanged, scorer, spill_path)
+
     Returns:
-        Dict[str, Dict[str, str]]: A dictionary mapping function IDs to their details.
+        str: Path of the spill file holding the pickled results for the chunk.
     """
-    function_details = {}
+    sheet_name, chunk1, chunk2, rows1, rows2, minor_threshold, major_threshold, function_details, include_unchanged, scorer, spill_path = args
     try:
-        if sheet_name not in workbook.sheetnames:
-            logger.warning(f"Sheet '{sheet_name}' not found in workbook. Function details will be empty.")
-            return function_details
-        
-        sheet = workbook[sheet_name]
-        headers = [cell.value for cell in sheet[1]]
-        key_index = headers.index(key_column)
-        name_index = headers.index('Function Name')
-        owner_index = headers.index('Owner')
-        
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            if row[key_index]:
-                function_details[str(row[key_index])] = {'name': row[name_index], 'owner': row[owner_index]}
+        results = compare_chunks(chunk1, chunk2, sheet_name, minor_threshold, major_threshold, function_details, rows1, rows2, include_unchanged, scorer)
     except Exception as e:
-        logger.error(f"Error in getting function details: {e}")
-        raise
-    return function_details
+        logger.error(f"Error processing chunk of sheet {sheet_name}: {e}")
+        results = []
+    info = cached_similarity.cache_info()
+    logger.debug(f"Similarity cache in worker {os.getpid()} after chunk of {sheet_name}: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries")
+    with open(spill_path, 'wb') as f:
+        pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return spill_path
 
-def generate_hash(values: List[str]) -> str:
+def schedule_chunks(aligned: List[Tuple], chunk_size: int, minor_threshold: float, major_threshold: float, function_details: Dict[str, Dict[str, str]], include_unchanged: bool, scorer: str, spill_dir: str) -> Iterator[Tuple]:
     """
-    Generate a hash value based on a list of values.
+    Split aligned sheets into row-range tasks, in report order.
+
+    Every sheet is cut into chunks of chunk_size rows so that one huge sheet spreads across
+    the whole pool instead of occupying a single worker. Tasks are built lazily, as run_bounded
+    submits them, so only the chunks in flight are copied out of the aligned sheets.
 
     Args:
-        values (List[str]): List of values to hash.
+        aligned (List[Tuple]): Output of process_sheet for every sheet, in report order.
+        chunk_size (int): Number of rows per task.
+        minor_threshold (float): Threshold for minor changes.
+        major_threshold (float): Threshold for major changes.
+        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        include_unchanged (bool): Whether to emit 'No change' results for identical cells.
+        scorer (str): Name of the similarity scorer in SCORERS.
+        spill_dir (str): Directory the chunk results are spilled to.
 
-    Returns:
-        str: A hash string representing the combined values.
+    Yields:
+        Tuple: The argument tuple for process_chunk of each chunk, sheet by sheet and row range by row range.
     """
-    hash_input = '|'.join([str(v) for v in values])
-    return hashlib.blake2b(hash_input.encode('utf-8'), digest_size=16).hexdigest()
+    for sheet_index, (sheet_name, matched1, matched2, rows1, rows2, _) in enumerate(aligned):
+        for chunk_index, start in enumerate(range(0, len(matched1), chunk_size)):
+            chunk1 = matched1.iloc[start:start + chunk_size]
+            chunk2 = matched2.iloc[start:start + chunk_size]
+            # Only ship the lookups this chunk needs
+            labels = chunk1.index
+            chunk_details = {label: function_details[label] for label in labels if label in function_details}
+            chunk_rows1 = {label: rows1[label] for label in labels}
+            chunk_rows2 = {label: rows2[label] for label in labels}
+            spill_path = os.path.join(spill_dir, f"{sheet_index}_{chunk_index}.pkl")
+            yield (sheet_name, chunk1, chunk2, chunk_rows1, chunk_rows2, minor_threshold, major_threshold, chunk_details, include_unchanged, scorer, spill_path)
 
-def compare_strings(s1: str, s2: str) -> float:
+def run_bounded(executor: concurrent.futures.Executor, tasks: Iterable[Tuple], max_pending: int) -> Iterator[Tuple]:
     """
-    Compare two strings and return a similarity ratio using SequenceMatcher.
+    Run tasks through run_instrumented on the pool, at most max_pending at a time, and yield their outputs in order.
+
+    The next task is submitted each time an output is taken, so the workers stay a bounded
+    number of tasks ahead of the consumer and their spill files never pile up while it lags.
+    Tasks not yet started are cancelled if the consumer stops early.
 
     Args:
-        s1 (str): The first string to compare.
-        s2 (str): The second string to compare.
+        executor (concurrent.futures.Executor): The worker pool.
+        tasks (Iterable[Tuple]): (function, args, cprofile_dir) tuples for run_instrumented.
+        max_pending (int): Maximum number of tasks submitted but not yet consumed.
 
-    Returns:
-        float: A similarity ratio between 0 and 1.
+    Yields:
+        Tuple: The (result, stats) output of each task, in task order.
     """
-    s1 = str(s1).strip().lower()
-    s2 = str(s2).strip().lower()
-    return SequenceMatcher(None, s1, s2).ratio()
+    tasks = iter(tasks)
+    pending = collections.deque()
+    try:
+        while True:
+            for task in itertools.islice(tasks, max(max_pending - len(pending), 0)):
+                pending.append(executor.submit(run_instrumented, task))
+            if not pending:
+                return
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
 
-def categorize_change(ratio: float, minor_threshold: float, major_threshold: float) -> str:
+def iter_results(aligned: List[Tuple], outputs: Iterator[Tuple], chunk_size: int, profile: Optional[Dict] = None) -> Iterator[Tuple]:
     """
-    Categorize the type of change based on the similarity ratio.
+    Yield comparison results in report order as the chunk tasks finish.
+
+    Chunks are read back from their spill files one at a time, in sheet and row order, and
+    each spill file is deleted once read, so memory holds a single chunk's results and the
+    spill directory only the chunks in flight, however large the diff is.
 
     Args:
-        ratio (float): The similarity ratio between 0 and 1.
-        minor_threshold (float): Threshold above which a change is considered minor.
-        major_threshold (float): Threshold above which a change is considered major.
+        aligned (List[Tuple]): Output of process_sheet for every sheet, in report order.
+        outputs (Iterator[Tuple]): run_bounded outputs of the schedule_chunks tasks, in the same order.
+        chunk_size (int): Number of rows per task.
+        profile (Optional[Dict]): Run profile receiving the chunk task stats, per-sheet result counts and the time spent waiting on workers.
 
-    Returns:
-        str: The category of change ('No change', 'Minor change', 'Major change', 'Substantial change').
+    Yields:
+        Tuple: One comparison result.
     """
-    if ratio == 1:
-        return 'No change'
-    elif ratio >= minor_threshold:
-        return 'Minor change'
-    elif ratio >= major_threshold:
-        return 'Major change'
-    else:
-        return 'Substantial change'
+    from tqdm import tqdm
 
-def compare_chunks(chunk1: pd.DataFrame, chunk2: pd.DataFrame, sheet_name: str, minor_threshold: float, major_threshold: float, function_details: Dict[str, Dict[str, str]]) -> List[Tuple]:
+    total = sum(math.ceil(len(matched1) / chunk_size) for _, matched1, _, _, _, _ in aligned)
+    with tqdm(total=total, desc="Comparing chunks") as progress:
+        for sheet_name, matched1, _, _, _, row_results in aligned:
+            for _ in range(math.ceil(len(matched1) / chunk_size)):
+                start = time.perf_counter()
+                spill_path, stats = next(outputs)
+                with open(spill_path, 'rb') as f:
+                    chunk_results = pickle.load(f)
+                os.remove(spill_path)
+                progress.update(1)
+                if profile is not None:
+                    profile['stages']['compare_wait'] = profile['stages'].get('compare_wait', 0.0) + time.perf_counter() - start
+                    profile['tasks'].append({**stats, 'sheet': sheet_name})
+                    profile['sheet_results'][sheet_name] += len(chunk_results)
+                yield from chunk_results
+            if profile is not None:
+                profile['sheet_results'][sheet_name] += len(row_results)
+            yield from row_results
+
+def get_worker_workbooks(file_path: str, read_mode: str) -> List:
     """
-    Compare two chunks of data and return the comparison results.
-    
+    Return the workbooks of a file opened for read_mode, reusing the ones this worker already has open.
+
+    A worker streaming several sheets of the same pair opens each workbook (and parses its
+    shared strings) once instead of once per sheet. Entries are keyed by the file's size and
+    modification time, so a rewritten file is reopened, and the least recently used are closed
+    beyond WORKER_WORKBOOK_LIMIT.
+
     Args:
-        chunk1 (pd.DataFrame): DataFrame chunk from the first sheet.
-        chunk2 (pd.DataFrame): DataFrame chunk from the second sheet.
-        sheet_name (str): Name of the sheet being compared.
-        minor_threshold (float): Threshold for minor changes.
-        major_threshold (float): Threshold for major changes.
-        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
-    
+        file_path (str): Path to the Excel file.
+        read_mode (str): 'values', 'formulas' or 'both'.
+
     Returns:
-        List[Tuple]: List of comparison results.
+        List: The opened workbooks (see open_workbooks).
     """
-    results = []
-    
-    # Ensure index is treated as strings
-    chunk1.index = chunk1.index.astype(str)
-    chunk2.index = chunk2.index.astype(str)
-    
-    # Combine DataFrames for comparison
-    combined = pd.concat([chunk1, chunk2], keys=['source1', 'source2'])
-    
-    for col in chunk1.columns:
-        grouped = combined.groupby(level=1)[col]
-        for idx, group in grouped:
-            if len(group) == 2:  # Value exists in both sources
-                val1, val2 = group.values
-                if pd.isna(val1) and pd.isna(val2):
-                    continue
-                ratio = compare_strings(str(val1), str(val2))
-                change_type = categorize_change(ratio, minor_threshold, major_threshold)
-                
-                # Get function details
-                function_id = str(chunk1.index[chunk1.index == idx][0])
-                function_name = function_details.get(function_id, {}).get('name', '')
-                owner = function_details.get(function_id, {}).get('owner', '')
-                
-                cell1 = f"{get_column_letter(chunk1.columns.get_loc(col) + 1)}{idx} ({col})"
-                cell2 = f"{get_column_letter(chunk2.columns.get_loc(col) + 1)}{idx} ({col})"
-                
-                results.append((function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type))
-            elif len(group) == 1:  # Value exists in only one source
-                source = group.index[0][0]
-                val = group.values[0]
-                if pd.isna(val):
-                    continue
-                
-                # Get function details
-                function_id = str(idx)
-                function_name = function_details.get(function_id, {}).get('name', '')
-                owner = function_details.get(function_id, {}).get('owner', '')
-                
-                if source == 'source1':
-                    cell = f"{get_column_letter(chunk1.columns.get_loc(col) + 1)}{idx} ({col})"
-                    results.append((function_id, function_name, owner, sheet_name, cell, val, '', '', 'Cell deleted'))
-                else:
-                    cell = f"{get_column_letter(chunk2.columns.get_loc(col) + 1)}{idx} ({col})"
-                    results.append((function_id, function_name, owner, sheet_name, '', '', cell, val, 'Cell added'))
-    
-    return results
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), read_mode)
+    cached = worker_workbooks.pop(key, None)
+    if cached is not None and cached[0] != (stat.st_size, stat.st_mtime_ns):
+        close_workbooks(cached[1])
+        cached = None
+    if cached is None:
+        cached = ((stat.st_size, stat.st_mtime_ns), open_workbooks(file_path, read_mode))
+    worker_workbooks[key] = cached
+    while len(worker_workbooks) > WORKER_WORKBOOK_LIMIT:
+        close_workbooks(worker_workbooks.popitem(last=False)[1][1])
+    return cached[1]
 
-def compare_sheets(sheet1: pd.DataFrame, sheet2: pd.DataFrame, sheet_name: str, minor_threshold: float, major_threshold: float, chunk_size: int, function_details: Dict[str, Dict[str, str]]) -> List[Tuple]:
+def fit_row(row: Optional[Tuple], width: int) -> Optional[Tuple]:
     """
-    Compare two sheets and return the comparison results.
+    Pad or cut a streamed row to the header's width; None (no row) and empty rows give None.
+    """
+    if row is None or all(value is None for value in row):
+        return None
+    return tuple(row[:width]) + (None,) * (width - len(row))
+
+def stream_sheet(args):
+    """
+    Compare one sheet by streaming both workbooks in lockstep and spill the results to disk.
+
+    Rows are read with openpyxl's read-only mode from workbooks the worker keeps open across
+    sheets (see get_worker_workbooks) and compared by position, chunk_size rows at a time, so
+    memory holds one batch of each sheet however long the sheets are. Rows are not aligned:
+    there is no key matching or move detection, and an inserted row shifts every row below it.
 
     Args:
-        sheet1 (pd.DataFrame): DataFrame of the first sheet.
-        sheet2 (pd.DataFrame): DataFrame of the second sheet.
-        sheet_name (str): Name of the sheet being compared.
-        minor_threshold (float): Threshold for minor changes.
-        major_threshold (float): Threshold for major changes.
-        chunk_size (int): Number of rows to process at a time.
-        function_details (Dict[str, Dict[str, str]]): Dictionary containing function details.
+        args: Tuple containing (sheet_name, file1_path, file2_path, read_mode, expand_merged, chunk_size, minor_threshold, major_threshold, function_details, include_unchanged, scorer, spill_path)
 
     Returns:
-        List[Tuple]: List of comparison results.
+        str: Path of the spill file, holding one pickled list of results per batch.
     """
-    results = []
-    
-    # Process the sheets in chunks
-    for start in range(0, len(sheet1), chunk_size):
-        end = start + chunk_size
-        chunk1 = sheet1.iloc[start:end]
-        chunk2 = sheet2.iloc[start:end]
-        
-        chunk_results = compare_chunks(chunk1, chunk2, sheet_name, minor_threshold, major_threshold, function_details)
-        results.extend(chunk_results)
-    
-    return results
+    sheet_name, file1_path, file2_path, read_mode, expand_merged, chunk_size, minor_threshold, major_threshold, function_details, include_unchanged, scorer, spill_path = args
+    rows1 = iter_sheet_rows(get_worker_workbooks(file1_path, read_mode), sheet_name, read_mode)
+    rows2 = iter_sheet_rows(get_worker_workbooks(file2_path, read_mode), sheet_name, read_mode)
+    if expand_merged:
+        rows1 = expand_merged_rows(rows1, read_merged_ranges(file1_path, [sheet_name]).get(sheet_name, []))
+        rows2 = expand_merged_rows(rows2, read_merged_ranges(file2_path, [sheet_name]).get(sheet_name, []))
+    header1 = header_names(next(rows1, ()))
+    header2 = header_names(next(rows2, ()))
 
-def process_sheet(args):
+    with open(spill_path, 'wb') as f:
+        _, column_results = align_columns(pd.DataFrame(columns=header1), pd.DataFrame(columns=header2), sheet_name)
+        pickle.dump(column_results, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Labels are row positions, as in positional alignment; row 1 holds the headers
+        pairs = enumerate(itertools.zip_longest(rows1, rows2))
+        while True:
+            batch = list(itertools.islice(pairs, chunk_size))
+            if not batch:
+                break
+            blocks = []
+            for side, header in ((0, header1), (1, header2)):
+                rows = [(str(position), fit_row(pair[side], len(header))) for position, pair in batch]
+                rows = [(label, row) for label, row in rows if row is not None]
+                blocks.append(pd.DataFrame([row for _, row in rows], index=pd.Index([label for label, _ in rows], dtype=object), columns=header))
+            worker_counters['rows_parsed'] += len(blocks[0]) + len(blocks[1])
+            numbers = {str(position): position + 2 for position, _ in batch}
+            try:
+                results = compare_chunks(blocks[0], blocks[1], sheet_name, minor_threshold, major_threshold, function_details, numbers, numbers, include_unchanged, scorer)
+            except Exception as e:
+                logger.error(f"Error processing rows {batch[0][0] + 2}-{batch[-1][0] + 2} of sheet {sheet_name}: {e}")
+                results = []
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return spill_path
+
+def iter_stream_results(sheet_names: List[str], outputs: Iterator[Tuple], profile: Optional[Dict] = None) -> Iterator[Tuple]:
     """
-    Process a single sheet for comparison.
+    Yield the results of streamed sheets in report order, one spilled batch at a time.
 
     Args:
-        args: Tuple containing (sheet_name, file1_path, file2_path, minor_threshold, major_threshold, chunk_size, function_details)
+        sheet_names (List[str]): The streamed sheets, in report order.
+        outputs (Iterator[Tuple]): run_bounded outputs of the stream_sheet tasks, in the same order.
+        profile (Optional[Dict]): Run profile receiving the task stats, per-sheet result counts and the time spent waiting on workers.
 
-    Returns:
-        Tuple: (sheet_name, comparison_results)
+    Yields:
+        Tuple: One comparison result.
+    """
+    from tqdm import tqdm
+
+    with tqdm(total=len(sheet_names), desc="Streaming sheets") as progress:
+        for sheet_name in sheet_names:
+            start = time.perf_counter()
+            spill_path, stats = next(outputs)
+            progress.update(1)
+            if profile is not None:
+                profile['stages']['compare_wait'] = profile['stages'].get('compare_wait', 0.0) + time.perf_counter() - start
+                profile['sheets'].setdefault(sheet_name, {})
+                profile['tasks'].append({**stats, 'sheet': sheet_name})
+            with open(spill_path, 'rb') as f:
+                while True:
+                    try:
+                        batch = pickle.load(f)
+                    except EOFError:
+                        break
+                    if profile is not None:
+                        profile['sheet_results'][sheet_name] += len(batch)
+                    yield from batch
+            os.remove(spill_path)
+
+@contextlib.contextmanager
+def profile_stage(profile: Optional[Dict], stage: str) -> Iterator[None]:
+    """
+    Add the wall time of the enclosed block to a stage of the run profile; does nothing when profiling is off.
+
+    Args:
+        profile (Optional[Dict]): The run profile, or None.
+        stage (str): Name of the stage.
     """
-    sheet_name, file1_path, file2_path, minor_threshold, major_threshold, chunk_size, function_details = args
+    start = time.perf_counter()
     try:
-        sheet1 = pd.read_excel(file1_path, sheet_name=sheet_name)
-        sheet2 = pd.read_excel(file2_path, sheet_name=sheet_name)
-        results = compare_sheets(sheet1, sheet2, sheet_name, minor_threshold, major_threshold, chunk_size, function_details)
-        return sheet_name, results
-    except Exception as e:
-        logger.error(f"Error processing sheet {sheet_name}: {e}")
-        return sheet_name, []
+        yield
+    finally:
+        if profile is not None:
+            profile['stages'][stage] = profile['stages'].get(stage, 0.0) + time.perf_counter() - start
+
+def write_profile(profile: Dict, profile_path: str, total_seconds: float) -> None:
+    """
+    Summarize a run profile per stage, sheet and worker and save it as JSON.
+
+    The write stage is the compare-and-write time not spent waiting on chunk tasks, so a run
+    is scoring bound when compare_wait dominates and report bound when write does.
+
+    Args:
+        profile (Dict): The run profile collected by compare_excel_files.
+        profile_path (str): Path of the JSON profile file.
+        total_seconds (float): Wall time of the whole run.
+    """
+    stages = dict(profile['stages'])
+    if 'compare_and_write' in stages:
+        stages['write'] = stages['compare_and_write'] - stages.get('compare_wait', 0.0)
+    stages['total'] = total_seconds
+
+    stage_names = {'load_workbook_sheets': 'load', 'process_sheet': 'align', 'process_chunk': 'compare', 'stream_sheet': 'compare'}
+    totals = collections.Counter()
+    workers = {}
+    sheets = {name: dict(sheet, results=profile['sheet_results'][name]) for name, sheet in profile['sheets'].items()}
+    for task in profile['tasks']:
+        counters = {key: value for key, value in task.items() if key not in ('function', 'pid', 'seconds', 'peak_rss_mb', 'sheet', 'file')}
+        totals.update(counters)
+
+        worker = workers.setdefault(str(task['pid']), {'tasks': 0, 'busy_seconds': 0.0, 'peak_rss_mb': task['peak_rss_mb']})
+        worker['tasks'] += 1
+        worker['busy_seconds'] += task['seconds']
+        if task['peak_rss_mb'] is not None:
+            worker['peak_rss_mb'] = max(worker['peak_rss_mb'], task['peak_rss_mb'])
+
+        if 'sheet' in task and task['sheet'] in sheets:
+            sheet = sheets[task['sheet']]
+            stage = stage_names[task['function']]
+            sheet[f"{stage}_seconds"] = sheet.get(f"{stage}_seconds", 0.0) + task['seconds']
+            if stage == 'compare':
+                sheet['chunks'] = sheet.get('chunks', 0) + 1
+                for key, value in counters.items():
+                    sheet[key] = sheet.get(key, 0) + value
+
+    def hit_rate(hits: int, misses: int) -> Optional[float]:
+        return hits / (hits + misses) if hits + misses else None
+
+    summary = {
+        'run': profile['run'],
+        'stages': stages,
+        'totals': dict(totals),
+        'cache_hit_rates': {
+            'parse': hit_rate(totals['parse_cache_hits'], totals['parse_cache_misses']),
+            'similarity': hit_rate(totals['similarity_cache_hits'], totals['similarity_cache_misses']),
+        },
+        'change_types': dict(profile['change_types']),
+        'sheets': sheets,
+        'workers': workers,
+        'main_peak_rss_mb': peak_rss_mb(),
+    }
+    with open(profile_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, default=str)
+    logger.info(f"Run profile saved to {profile_path}")
+
+def count_changes(results: Iterable[Tuple], counts: collections.Counter) -> Iterator[Tuple]:
+    """
+    Pass results through unchanged while tallying them by change type.
+
+    Args:
+        results (Iterable[Tuple]): Comparison results.
+        counts (collections.Counter): Counter receiving one count per result, keyed by change type.
+
+    Yields:
+        Tuple: One comparison result.
+    """
+    for result in results:
+        counts[result[-1]] += 1
+        yield result
+
+def write_report(results: Iterable[Tuple], output_path: str, output_format: str, file1_path: str, file2_path: str, conditional_fill: bool = False) -> None:
+    """
+    Write comparison results in the requested output format.
+
+    Args:
+        results (Iterable[Tuple]): Comparison results, consumed once.
+        output_path (str): Path to save the output file.
+        output_format (str): 'excel', 'csv', 'json', 'jsonl', 'parquet' or 'feather'.
+        file1_path (str): Path of the first input Excel file, for the Excel report.
+        file2_path (str): Path of the second input Excel file, for the Excel report.
+        conditional_fill (bool): For Excel output, colour rows with conditional formatting instead of per-cell fills.
+
+    Raises:
+        ValueError: If the output format is not supported.
+    """
+    if output_format == 'excel':
+        generate_excel_output(results, output_path, file1_path, file2_path, conditional_fill)
+    elif output_format == 'csv':
+        generate_csv_output(results, output_path)
+    elif output_format == 'json':
+        generate_json_output(results, output_path)
+    elif output_format == 'jsonl':
+        generate_jsonl_output(results, output_path)
+    elif output_format in ('parquet', 'feather'):
+        generate_arrow_output(results, output_path, output_format)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
 
 def compare_excel_files(
-    file1_path: str,
+    file1_path: Optional[str],
     file2_path: str,
     output_path: str,
     minor_threshold: float,
@@ -244,13 +1873,27 @@ def compare_excel_files(
     ignore_sheets: List[str],
     chunk_size: int,
     num_processes: int,
-    output_format: str
-) -> None:
+    output_format: str,
+    key_columns: Optional[List[str]] = None,
+    include_unchanged: bool = False,
+    cache_dir: Optional[str] = None,
+    cache_size_mb: int = 1024,
+    conditional_fill: bool = False,
+    scorer: str = 'sequencematcher',
+    state_dir: Optional[str] = None,
+    profile_path: Optional[str] = None,
+    cprofile_dir: Optional[str] = None,
+    detect_renames: bool = False,
+    read_mode: str = 'values',
+    engine: str = 'pandas',
+    expand_merged: bool = False,
+    executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+) -> Dict[str, int]:
     """
     Main function to compare two Excel files and generate a comparison report.
     
     Args:
-        file1_path (str): Path to the first Excel file.
+        file1_path (Optional[str]): Path to the first Excel file; may be None when state_dir holds a stored snapshot.
         file2_path (str): Path to the second Excel file.
         output_path (str): Path to save the output file.
         minor_threshold (float): Threshold for minor changes.
@@ -258,63 +1901,313 @@ def compare_excel_files(
         ignore_sheets (List[str]): List of sheet names to ignore.
         chunk_size (int): Number of rows to process at a time.
         num_processes (int): Number of processes to use for parallel processing.
-        output_format (str): Format of the output file ('excel', 'csv', or 'json').
+        output_format (str): Format of the output file ('excel', 'csv', 'json', 'jsonl', 'parquet' or 'feather').
+        key_columns (Optional[List[str]]): Columns identifying a row; None compares rows by position.
+        include_unchanged (bool): Whether to report identical cells as 'No change'.
+        cache_dir (Optional[str]): Directory for cached parsed sheets; None disables caching.
+        cache_size_mb (int): Maximum size of the cache directory in megabytes.
+        conditional_fill (bool): For Excel output, colour rows with conditional formatting instead of per-cell fills.
+        scorer (str): Name of the similarity scorer in SCORERS.
+        state_dir (Optional[str]): Incremental state directory. The first file is replaced by the snapshot stored
+            there, and the second file is stored as the snapshot for the next run; None disables incremental mode.
+        profile_path (Optional[str]): Save per-stage, per-sheet and per-worker measurements to this JSON file.
+        cprofile_dir (Optional[str]): Save a cProfile dump per worker process to this directory.
+        detect_renames (bool): Report added and dropped columns with matching contents as renames.
+        read_mode (str): Compare cached 'values', 'formulas', or 'both' (see iter_sheet_rows).
+        engine (str): 'pandas' aligns whole sheets in memory; 'stream' compares rows by position in
+            bounded memory (see stream_sheet) and supports neither key columns nor incremental state.
+        expand_merged (bool): Fill every cell of a merged range with the range's value before comparing.
+        executor (Optional[ProcessPoolExecutor]): Process pool shared with other comparisons (see run_batch);
+            None starts a pool of num_processes workers for this comparison.
+
+    Returns:
+        Dict[str, int]: Number of results per change type.
+
+    Raises:
+        ValueError: If the stream engine is asked for key columns or incremental state, the stored
+            snapshot was read with other options, or a workbook's sheets cannot be listed.
     """
+    from concurrent.futures import ProcessPoolExecutor
+    from tqdm import tqdm
+
+    # The stream engine never holds file2's sheets, so it has no snapshot to store, and it pairs rows by position
+    if engine == 'stream' and state_dir:
+        raise ValueError("Incremental state is not supported by the stream engine.")
+    if engine == 'stream' and key_columns:
+        raise ValueError("Key columns are not supported by the stream engine, which compares rows by position.")
+
+    function_details_sheet = 'Core OCIR Data'  # Update if different
+    run_start = time.perf_counter()
+    change_counts = collections.Counter()
+    profile = {
+        'run': {'file1': file1_path, 'file2': file2_path, 'output': output_path, 'format': output_format, 'processes': num_processes,
+                'chunk_size': chunk_size, 'scorer': scorer, 'key_columns': key_columns, 'incremental': state_dir is not None,
+                'read_mode': read_mode, 'engine': engine, 'expand_merged': expand_merged},
+        'stages': {}, 'sheets': {}, 'tasks': [], 'change_types': change_counts, 'sheet_results': collections.Counter()
+    } if profile_path else None
+    if cprofile_dir:
+        os.makedirs(cprofile_dir, exist_ok=True)
+
+    # In incremental mode the previous snapshot comes from the state directory and is not parsed again
+    manifest, previous = None, {}
+    if state_dir:
+        with profile_stage(profile, 'load_state'):
+            manifest, previous = load_snapshot_state(state_dir)
+    if manifest is not None:
+        if manifest.get('read_mode', 'values') != read_mode or manifest.get('expand_merged', False) != expand_merged:
+            raise ValueError(f"The snapshot in {state_dir} was read with read mode '{manifest.get('read_mode', 'values')}' and expand_merged={manifest.get('expand_merged', False)}; rerun with the same options.")
+        file1_path = manifest['source']
+        logger.info(f"Comparing against the stored snapshot of {file1_path}")
+        if profile is not None:
+            profile['run']['file1'] = file1_path
+
     try:
-        # Load workbooks
-        wb1 = openpyxl.load_workbook(file1_path, read_only=True)
-        wb2 = openpyxl.load_workbook(file2_path, read_only=True)
-        
-        sheets_to_compare = [sheet for sheet in wb1.sheetnames if sheet in wb2.sheetnames and sheet not in ignore_sheets]
-        
-        # Get function details
-        function_details_sheet = 'Core OCIR Data'  # Update if different
-        function_details = get_function_details(wb1, function_details_sheet, 'Function ID')
-        
-        # Close workbooks to free up memory
-        wb1.close()
-        wb2.close()
-        
+        # List sheets from the workbook manifests; no sheet data is parsed here
+        with profile_stage(profile, 'list_sheets'):
+            sheet_names2 = list_sheet_names(file2_path)
+            if manifest is not None:
+                sheet_names1 = list(previous)
+            elif file1_path is not None:
+                sheet_names1 = list_sheet_names(file1_path)
+            else:
+                sheet_names1 = []
+        sheets_to_compare = [sheet for sheet in sheet_names1 if sheet in sheet_names2 and sheet not in ignore_sheets]
+        sheets_to_load1 = sheets_to_compare + [function_details_sheet] if function_details_sheet in sheet_names1 and function_details_sheet not in sheets_to_compare else sheets_to_compare
+        # The stored snapshot keeps every sheet, since the next snapshot may be compared on sheets this one is not
+        sheets_to_load2 = [sheet for sheet in sheet_names2 if sheet not in ignore_sheets or sheet == function_details_sheet] if state_dir else sheets_to_compare
     except Exception as e:
-        logger.error(f"Error loading workbooks: {e}")
-        sys.exit(1)
+        raise ValueError(f"Error loading workbooks {file1_path} and {file2_path}: {e}") from e
 
-    # Prepare arguments for multiprocessing
-    args_list = [(sheet, file1_path, file2_path, minor_threshold, major_threshold, chunk_size, function_details) for sheet in sheets_to_compare]
+    if state_dir and manifest is None and file1_path is None:
+        with profile_stage(profile, 'load'):
+            loaded2 = load_workbook_sheets((file2_path, sheets_to_load2, cache_dir, cache_size_mb, read_mode, expand_merged))
+        with profile_stage(profile, 'save_state'):
+            save_snapshot_state(state_dir, file2_path, loaded2, read_mode, expand_merged)
+        logger.info(f"No snapshot stored in {state_dir}; recorded {file2_path} as the baseline")
+        if profile is not None:
+            write_profile(profile, profile_path, time.perf_counter() - run_start)
+        return {}
 
-    # Process sheets in parallel
-    with ProcessPoolExecutor(max_workers=num_processes) as executor:
-        results = list(tqdm(executor.map(process_sheet, args_list), total=len(args_list), desc="Processing sheets"))
+    with ProcessPoolExecutor(max_workers=num_processes, initializer=init_worker, initargs=(logger.level,)) if executor is None else contextlib.nullcontext(executor) as executor:
+        if engine == 'stream':
+            # Only the function details are parsed up front; the workers stream the compared sheets
+            jobs = [(file1_path, [function_details_sheet] if function_details_sheet in sheet_names1 else [], cache_dir, cache_size_mb, 'values', False)]
+        else:
+            # Parse each workbook once, both workbooks at the same time
+            jobs = [(file2_path, sheets_to_load2, cache_dir, cache_size_mb, read_mode, expand_merged)]
+            if manifest is None:
+                jobs.insert(0, (file1_path, sheets_to_load1, cache_dir, cache_size_mb, read_mode, expand_merged))
+        with profile_stage(profile, 'load'):
+            outputs = list(executor.map(run_instrumented, [(load_workbook_sheets, job, cprofile_dir) for job in jobs]))
+        loaded = [result for result, _ in outputs]
+        loaded1 = previous if manifest is not None else loaded[0]
+        loaded2 = loaded[-1]
+        if profile is not None:
+            profile['tasks'].extend({**stats, 'file': job[0]} for job, (_, stats) in zip(jobs, outputs))
 
-    # Aggregate results
-    all_results = [result for sheet_results in results for result in sheet_results]
+        # Get function details
+        if function_details_sheet in loaded1:
+            function_details = get_function_details(loaded1[function_details_sheet][0], 'Function ID')
+        else:
+            logger.warning(f"Sheet '{function_details_sheet}' not found in workbook. Function details will be empty.")
+            function_details = {}
 
-    # Generate output based on the specified format
-    if output_format == 'excel':
-        generate_excel_output(all_results, output_path, file1_path, file2_path)
-    elif output_format == 'csv':
-        generate_csv_output(all_results, output_path)
-    elif output_format == 'json':
-        generate_json_output(all_results, output_path)
-    else:
-        logger.error(f"Unsupported output format: {output_format}")
-        sys.exit(1)
+        # Align rows of every sheet in parallel
+        args_list = [(sheet, loaded1[sheet][0], loaded2[sheet][0], loaded1[sheet][1], loaded2[sheet][1], function_details, key_columns, include_unchanged, detect_renames) for sheet in sheets_to_compare if sheet in loaded1 and sheet in loaded2] if engine != 'stream' else []
+        with profile_stage(profile, 'align'):
+            outputs = list(tqdm(executor.map(run_instrumented, [(process_sheet, args, cprofile_dir) for args in args_list]), total=len(args_list), desc="Aligning sheets"))
+        aligned = [result for result, _ in outputs]
+        if profile is not None:
+            for args, (result, stats) in zip(args_list, outputs):
+                profile['sheets'][result[0]] = {'rows1': len(args[1]), 'rows2': len(args[2]), 'matched_rows': len(result[1])}
+                profile['tasks'].append({**stats, 'sheet': result[0]})
+
+        # Compare the aligned rows as chunk tasks spread across the whole pool,
+        # writing the report while the remaining chunks are still running
+        spill_dir = tempfile.mkdtemp(prefix='compare_')
+        try:
+            with profile_stage(profile, 'compare_and_write'):
+                # Keep about two tasks per worker in flight, enough to keep the pool busy without
+                # the spill directory growing while the writer catches up
+                max_pending = 2 * (num_processes or os.cpu_count() or 1)
+                if engine == 'stream':
+                    tasks = (
+                        (stream_sheet, (sheet, file1_path, file2_path, read_mode, expand_merged, chunk_size, minor_threshold, major_threshold, function_details, include_unchanged, scorer, os.path.join(spill_dir, f"{i}.pkl")), cprofile_dir)
+                        for i, sheet in enumerate(sheets_to_compare)
+                    )
+                    results = iter_stream_results(sheets_to_compare, run_bounded(executor, tasks, max_pending), profile)
+                else:
+                    tasks = ((process_chunk, args, cprofile_dir) for args in schedule_chunks(aligned, chunk_size, minor_threshold, major_threshold, function_details, include_unchanged, scorer, spill_dir))
+                    results = iter_results(aligned, run_bounded(executor, tasks, max_pending), chunk_size, profile)
+                write_report(count_changes(results, change_counts), output_path, output_format, file1_path, file2_path, conditional_fill)
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
 
     logger.info(f"Comparison report saved to {output_path}")
 
-def generate_excel_output(results: List[Tuple], output_path: str, file1_path: str, file2_path: str) -> None:
+    # Advance the chain only once the report has been written
+    if state_dir:
+        with profile_stage(profile, 'save_state'):
+            save_snapshot_state(state_dir, file2_path, loaded2, read_mode, expand_merged)
+        logger.info(f"Stored {file2_path} as the snapshot for the next incremental run")
+
+    if profile is not None:
+        write_profile(profile, profile_path, time.perf_counter() - run_start)
+    return dict(change_counts)
+
+def read_batch_manifest(manifest_path: str) -> List[Dict[str, str]]:
+    """
+    Read the workbook pairs of a batch from a CSV or JSON manifest.
+
+    A CSV manifest has a header row with file1, file2 and (optionally) output columns; a JSON
+    manifest is a list of objects with the same keys. Relative paths are taken relative to
+    the manifest's directory.
+
+    Args:
+        manifest_path (str): Path to the manifest (.csv or .json).
+
+    Returns:
+        List[Dict[str, str]]: One dict per pair with 'file1', 'file2' and 'output' ('' if not given).
+    """
+    if manifest_path.lower().endswith('.json'):
+        with open(manifest_path, encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        with open(manifest_path, newline='', encoding='utf-8-sig') as f:
+            entries = list(csv.DictReader(f))
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    pairs = []
+    for i, entry in enumerate(entries, start=1):
+        entry = {str(key).strip().lower(): str(value or '').strip() for key, value in entry.items() if key is not None}
+        if not entry.get('file1') or not entry.get('file2'):
+            raise ValueError(f"Entry {i} of {manifest_path} needs both file1 and file2.")
+        pairs.append({key: os.path.normpath(os.path.join(base, entry[key])) if entry.get(key) else '' for key in ('file1', 'file2', 'output')})
+    return pairs
+
+def run_batch(pairs: List[Dict[str, str]], summary_path: str, concurrency: int, num_processes: int, output_format: str, **options) -> List[Dict]:
+    """
+    Compare many workbook pairs on one shared process pool and write a summary.
+
+    Up to `concurrency` pairs are in flight at once, each driven from a thread of this process,
+    and all of them feed the same pool, so the chunk tasks of every sheet of every pair share
+    one queue and the pool is started once for the whole batch. A failing pair is recorded in
+    the summary and does not stop the others.
+
+    Args:
+        pairs (List[Dict[str, str]]): Pairs from read_batch_manifest. Missing outputs default to
+            '<file1>_vs_<file2>_comparison.<ext>' next to the second file.
+        summary_path (str): Path of the JSON summary.
+        concurrency (int): Number of pairs compared at the same time.
+        num_processes (int): Number of worker processes in the shared pool.
+        output_format (str): Format of every report.
+        **options: Remaining keyword arguments of compare_excel_files. A profile_path is
+            replaced by one '<output>_profile.json' per pair.
+
+    Returns:
+        List[Dict]: Per pair, its paths, status, wall time and result counts.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    extension = OUTPUT_EXTENSIONS[output_format]
+    for pair in pairs:
+        if not pair['output']:
+            stem1, stem2 = (os.path.splitext(os.path.basename(pair[key]))[0] for key in ('file1', 'file2'))
+            pair['output'] = os.path.join(os.path.dirname(pair['file2']), f"{stem1}_vs_{stem2}_comparison.{extension}")
+
+    def run(pair: Dict[str, str]) -> Dict:
+        start = time.perf_counter()
+        pair_options = dict(options)
+        if options.get('profile_path'):
+            pair_options['profile_path'] = f"{os.path.splitext(pair['output'])[0]}_profile.json"
+        try:
+            counts = compare_excel_files(pair['file1'], pair['file2'], pair['output'], num_processes=num_processes, output_format=output_format, executor=executor, **pair_options)
+            return {**pair, 'status': 'ok', 'seconds': time.perf_counter() - start, 'results': sum(counts.values()), 'change_types': counts}
+        except Exception as e:
+            # A failing pair is recorded with its cause and does not stop the batch
+            logger.error(f"Comparison of {pair['file1']} and {pair['file2']} failed: {e}")
+            return {**pair, 'status': 'failed', 'seconds': time.perf_counter() - start, 'error': f"{type(e).__name__}: {e}"}
+
+    # The pairs are driven from threads, so the lazy imports must be finished first
+    finish_lazy_imports()
+
+    batch_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_processes, initializer=init_worker, initargs=(logger.level,)) as executor, ThreadPoolExecutor(max_workers=concurrency) as threads:
+        summary = list(threads.map(run, pairs))
+
+    failed = sum(entry['status'] != 'ok' for entry in summary)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump({'pairs': summary, 'ok': len(summary) - failed, 'failed': failed, 'seconds': time.perf_counter() - batch_start}, f, indent=2)
+    logger.info(f"Batch of {len(summary)} pair(s) finished: {len(summary) - failed} ok, {failed} failed. Summary saved to {summary_path}")
+    return summary
+
+def watch_snapshots(watch_dir: str, state_dir: str, output_dir: str, poll_interval: float, **options) -> None:
+    """
+    Watch a directory for new snapshots and compare each one against the previous snapshot, in order of modification time.
+
+    A snapshot is picked up once it has not been modified for a full poll interval, so files still being
+    copied in are left for the next poll. Runs until interrupted.
+
+    A snapshot that cannot be compared (corrupt, unreadable) is logged and skipped rather than stopping the
+    watcher. It is not retried unless it is modified again. The stored snapshot only advances after a
+    successful comparison, so the next good snapshot is compared against the last good one and the
+    incremental chain stays intact.
+
+    Args:
+        watch_dir (str): Directory the snapshots are delivered to.
+        state_dir (str): Incremental state directory holding the previous snapshot.
+        output_dir (str): Directory the reports are written to, one per snapshot.
+        poll_interval (float): Seconds between polls.
+        **options: Remaining keyword arguments of compare_excel_files.
+    """
+    manifest = read_snapshot_manifest(state_dir)
+    last_mtime = manifest['mtime'] if manifest else 0.0
+    extension = OUTPUT_EXTENSIONS[options['output_format']]
+
+    while True:
+        now = time.time()
+        snapshots = sorted(
+            (os.path.getmtime(path), path)
+            for path in (os.path.join(watch_dir, name) for name in os.listdir(watch_dir))
+            if path.lower().endswith('.xlsx') and not os.path.basename(path).startswith('~$') and not path.endswith(f"_comparison.{extension}")
+        )
+        for mtime, path in snapshots:
+            if mtime <= last_mtime or now - mtime < poll_interval:
+                continue
+            stem = os.path.splitext(os.path.basename(path))[0]
+            output_path = os.path.join(output_dir, f"{stem}_comparison.{extension}")
+            logger.info(f"New snapshot {path}")
+            try:
+                compare_excel_files(None, path, output_path, state_dir=state_dir, **options)
+            except Exception as e:
+                logger.error(f"Skipping snapshot {path}; it will be retried only if modified again: {e}")
+            last_mtime = mtime
+        time.sleep(poll_interval)
+
+def generate_excel_output(results: Iterable[Tuple], output_path: str, file1_path: str, file2_path: str, conditional_fill: bool = False) -> None:
     """
     Generate an Excel output file with the comparison results.
+
+    The workbook is written in openpyxl's write-only mode, so rows go straight to disk and
+    every cell shares one of a handful of named styles. Column widths are the running
+    maxima over the header, the side panel and the first WIDTH_SAMPLE_ROWS results, since a
+    streamed sheet must declare its widths before its first row.
     
     Args:
-        results (List[Tuple]): List of comparison results.
+        results (Iterable[Tuple]): Comparison results.
         output_path (str): Path to save the output Excel file.
         file1_path (str): Path of the first input Excel file.
         file2_path (str): Path of the second input Excel file.
+        conditional_fill (bool): Colour rows with conditional formatting on the Change Summary column instead of per-cell fills.
     """
-    wb_output = openpyxl.Workbook()
-    ws_output = wb_output.active
-    ws_output.title = 'Comparison'
+    import openpyxl
+    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+    from openpyxl.cell import Cell, WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.utils import get_column_letter
+
+    wb_output = openpyxl.Workbook(write_only=True)
+    ws_output = wb_output.create_sheet('Comparison')
 
     # Define colors for different types of changes
     colors = {
@@ -324,80 +2217,102 @@ def generate_excel_output(results: List[Tuple], output_path: str, file1_path: st
         'Major change': 'FFD966',
         'Substantial change': 'F4B084',
         'Moved with no change': 'D9E1F2',
+        'Row added': 'A9D08E',
+        'Row deleted': 'FF9999',
+        'Column added': '70AD47',
+        'Column deleted': 'FF6666',
+        'Column moved': 'B4C6E7',
+        'Column renamed': 'FFE699',
         'No change': 'FFFFFF'
     }
 
+    # Register one shared named style per look instead of styling cells one by one
+    thin = Side(style='thin')
+    wb_output.add_named_style(NamedStyle(name='Comparison Header', font=Font(bold=True, color='000000'), fill=PatternFill(start_color='BDD7EE', end_color='BDD7EE', fill_type='solid'), alignment=Alignment(horizontal='center', vertical='center')))
+    wb_output.add_named_style(NamedStyle(name='Comparison Legend Title', font=Font(bold=True)))
+    for change_type, color in colors.items():
+        fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+        wb_output.add_named_style(NamedStyle(name=f'Comparison {change_type}', fill=fill))
+        wb_output.add_named_style(NamedStyle(name=f'Comparison Legend {change_type}', fill=fill, border=Border(left=thin, right=thin, top=thin, bottom=thin)))
+
+    def styled(value, style: str) -> Cell:
+        cell = WriteOnlyCell(ws_output, value=value)
+        cell.style = style
+        return cell
+
+    # Source file details and the color legend sit in columns L:M next to the results
+    side_panel = {
+        2: ['Source 1:', os.path.basename(file1_path)],
+        3: ['Source 2:', os.path.basename(file2_path)],
+        5: [styled('Color Legend', 'Comparison Legend Title')]
+    }
+    for i, change_type in enumerate(colors, start=6):
+        side_panel[i] = [styled(change_type, f'Comparison Legend {change_type}')]
+
     # Set up the header row
     headers = ['Sr. No', 'Function ID', 'Function Name', 'Owner', 'Sheet Name', 'Source 1 Cell', 'Source 1 Value', 'Source 2 Cell', 'Source 2 Value', 'Change Summary']
-    ws_output.append(headers)
+    widths = [len(header) for header in headers] + [0, 0, 0]
+
+    def track_widths(values: List, offset: int = 0) -> None:
+        for col, value in enumerate(values, start=offset):
+            value = value.value if isinstance(value, Cell) else value
+            if value is not None and value != '':
+                widths[col] = max(widths[col], len(str(value)))
 
-    # Format the header row
-    for col in range(1, len(headers) + 1):
-        cell = ws_output.cell(row=1, column=col)
-        cell.font = Font(bold=True, color='000000')
-        cell.fill = PatternFill(start_color='BDD7EE', end_color='BDD7EE', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center', vertical='center')
+    for values in side_panel.values():
+        track_widths(values, offset=11)
 
-    # Add source file details
-    ws_output['L2'] = 'Source 1:'
-    ws_output['M2'] = os.path.basename(file1_path)
-    ws_output['L3'] = 'Source 2:'
-    ws_output['M3'] = os.path.basename(file2_path)
+    def build_row(row_idx: int, values: List, change_type: Optional[str]) -> List:
+        if change_type is None or conditional_fill:
+            row = list(values)
+        else:
+            style = f'Comparison {change_type}' if change_type in colors else 'Comparison No change'
+            row = [styled(value, style) for value in values]
+        side = side_panel.get(row_idx)
+        if side:
+            row += [None] * (11 - len(row)) + side
+        return row
+
+    # Buffer the first results to size the columns, then stream everything else
+    results = iter(results)
+    buffered = []
+    for result in itertools.islice(results, WIDTH_SAMPLE_ROWS):
+        values = [len(buffered) + 1, *result]
+        track_widths(values)
+        buffered.append(values)
+
+    for col, width in enumerate(widths, start=1):
+        if width:
+            ws_output.column_dimensions[get_column_letter(col)].width = min(width + 2, 50)  # Cap width at 50
+
+    ws_output.append([styled(header, 'Comparison Header') for header in headers])
 
     # Add comparison results
-    for idx, result in enumerate(results, start=2):
-        function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type = result
-        ws_output.append([
-            idx - 1,  # Sr. No
-            function_id,
-            function_name,
-            owner,
-            sheet_name,
-            cell1,
-            val1,
-            cell2,
-            val2,
-            change_type
-        ])
-        
-        # Apply color formatting
-        for col in range(1, 11):
-            ws_output.cell(row=idx, column=col).fill = PatternFill(
-                start_color=colors.get(change_type, 'FFFFFF'),
-                end_color=colors.get(change_type, 'FFFFFF'),
-                fill_type='solid'
-            )
-
-    # Add color legends
-    ws_output['L5'] = 'Color Legend'
-    ws_output['L5'].font = Font(bold=True)
-    for i, (change_type, color) in enumerate(colors.items(), start=6):
-        cell = ws_output.cell(row=i, column=12, value=change_type)
-        cell.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
-        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-    # Adjust column widths
-    for col in ws_output.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if cell.value and len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min((max_length + 2), 50)  # Cap width at 50
-        ws_output.column_dimensions[column].width = adjusted_width
+    row_idx = 1
+    for values in itertools.chain(buffered, ([idx, *result] for idx, result in enumerate(results, start=len(buffered) + 1))):
+        row_idx += 1
+        ws_output.append(build_row(row_idx, values, values[-1]))
+
+    # Finish the side panel if there were fewer results than legend rows
+    last_row = row_idx
+    while row_idx < max(side_panel):
+        row_idx += 1
+        ws_output.append(build_row(row_idx, [], None))
+
+    if conditional_fill and last_row > 1:
+        for change_type, color in colors.items():
+            fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+            ws_output.conditional_formatting.add(f'A2:J{last_row}', FormulaRule(formula=[f'$J2="{change_type}"'], fill=fill))
 
     # Save the output workbook
     wb_output.save(output_path)
 
-def generate_csv_output(results: List[Tuple], output_path: str) -> None:
+def generate_csv_output(results: Iterable[Tuple], output_path: str) -> None:
     """
-    Generate a CSV output file with the comparison results.
+    Generate a CSV output file with the comparison results, writing rows as they arrive.
     
     Args:
-        results (List[Tuple]): List of comparison results.
+        results (Iterable[Tuple]): Comparison results.
         output_path (str): Path to save the output CSV file.
     """
     with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
@@ -408,32 +2323,132 @@ def generate_csv_output(results: List[Tuple], output_path: str) -> None:
             function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type = result
             writer.writerow([idx, function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type])
 
-def generate_json_output(results: List[Tuple], output_path: str) -> None:
+def result_to_dict(idx: int, result: Tuple) -> Dict:
+    """
+    Convert a comparison result tuple into a report record.
+
+    Args:
+        idx (int): Serial number of the result.
+        result (Tuple): The comparison result.
+
+    Returns:
+        Dict: The result keyed by report column name.
+    """
+    function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type = result
+    return {
+        'Sr. No': idx,
+        'Function ID': function_id,
+        'Function Name': function_name,
+        'Owner': owner,
+        'Sheet Name': sheet_name,
+        'Source 1 Cell': cell1,
+        'Source 1 Value': val1,
+        'Source 2 Cell': cell2,
+        'Source 2 Value': val2,
+        'Change Summary': change_type
+    }
+
+def generate_json_output(results: Iterable[Tuple], output_path: str) -> None:
     """
     Generate a JSON output file with the comparison results.
+
+    The array is written one record at a time, so the results never need to be held in memory.
     
     Args:
-        results (List[Tuple]): List of comparison results.
+        results (Iterable[Tuple]): Comparison results.
         output_path (str): Path to save the output JSON file.
     """
-    json_results = []
-    for idx, result in enumerate(results, start=1):
-        function_id, function_name, owner, sheet_name, cell1, val1, cell2, val2, change_type = result
-        json_results.append({
-            'Sr. No': idx,
-            'Function ID': function_id,
-            'Function Name': function_name,
-            'Owner': owner,
-            'Sheet Name': sheet_name,
-            'Source 1 Cell': cell1,
-            'Source 1 Value': val1,
-            'Source 2 Cell': cell2,
-            'Source 2 Value': val2,
-            'Change Summary': change_type
-        })
+    with open(output_path, 'w', encoding='utf-8') as jsonfile:
+        jsonfile.write('[')
+        for idx, result in enumerate(results, start=1):
+            record = json.dumps(result_to_dict(idx, result), indent=2, default=str)
+            jsonfile.write(',\n  ' if idx > 1 else '\n  ')
+            jsonfile.write(record.replace('\n', '\n  '))
+        jsonfile.write('\n]' if jsonfile.tell() > 1 else ']')
+
+def generate_jsonl_output(results: Iterable[Tuple], output_path: str) -> None:
+    """
+    Generate a JSON Lines output file with one comparison result per line.
     
+    Args:
+        results (Iterable[Tuple]): Comparison results.
+        output_path (str): Path to save the output JSON Lines file.
+    """
     with open(output_path, 'w', encoding='utf-8') as jsonfile:
-        json.dump(json_results, jsonfile, indent=2)
+        for idx, result in enumerate(results, start=1):
+            jsonfile.write(json.dumps(result_to_dict(idx, result), default=str))
+            jsonfile.write('\n')
+
+def generate_arrow_output(results: Iterable[Tuple], output_path: str, file_format: str = 'parquet') -> None:
+    """
+    Generate a Parquet or Feather (Arrow IPC) output file with the comparison results.
+
+    Results are written in batches of ARROW_BATCH_ROWS, each becoming one Parquet row group or
+    one IPC record batch, so the full result set is never held in memory. Sheet Name and
+    Change Summary are dictionary-encoded; cell values are stored as strings, with empty
+    cells as nulls. Requires pyarrow.
+    
+    Args:
+        results (Iterable[Tuple]): Comparison results.
+        output_path (str): Path to save the output file.
+        file_format (str): 'parquet' or 'feather'.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    text = pa.string()
+    category = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([
+        ('Sr. No', pa.int64()),
+        ('Function ID', text),
+        ('Function Name', text),
+        ('Owner', text),
+        ('Sheet Name', category),
+        ('Source 1 Cell', text),
+        ('Source 1 Value', text),
+        ('Source 2 Cell', text),
+        ('Source 2 Value', text),
+        ('Change Summary', category)
+    ])
+
+    # Dictionaries only ever grow, so every batch can share them (as deltas in IPC files)
+    dictionaries = {field.name: {} for field in schema if field.type == category}
+
+    def to_text(value):
+        if isinstance(value, str):
+            return value if value != '' else None
+        return None if value is None or pd.isna(value) else str(value)
+
+    def to_batch(rows: List[Tuple]) -> pa.RecordBatch:
+        arrays = []
+        for field, values in zip(schema, zip(*rows)):
+            if field.type == category:
+                lookup = dictionaries[field.name]
+                indices = pa.array([lookup.setdefault(str(value), len(lookup)) for value in values], pa.int32())
+                arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(list(lookup), pa.string())))
+            elif field.type == text:
+                arrays.append(pa.array([to_text(value) for value in values], text))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.record_batch(arrays, schema=schema)
+
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(output_path, schema)
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = ipc.new_file(output_path, schema, options=ipc.IpcWriteOptions(compression='lz4', emit_dictionary_deltas=True))
+        write = writer.write_batch
+
+    try:
+        numbered = ((idx, *result) for idx, result in enumerate(results, start=1))
+        while True:
+            rows = list(itertools.islice(numbered, ARROW_BATCH_ROWS))
+            if not rows:
+                break
+            write(to_batch(rows))
+    finally:
+        writer.close()
 
 def main():
     """
@@ -446,9 +2461,27 @@ def main():
     parser.add_argument('-mth', '--minor_threshold', type=float, default=0.8, help='Threshold for minor changes (default: 0.8).')
     parser.add_argument('-majth', '--major_threshold', type=float, default=0.5, help='Threshold for major changes (default: 0.5).')
     parser.add_argument('-is', '--ignore_sheets', nargs='*', default=[], help='Sheets to ignore during comparison.')
-    parser.add_argument('-cs', '--chunk_size', type=int, default=1000, help='Number of rows to process at a time (default: 1000).')
-    parser.add_argument('-p', '--processes', type=int, default=multiprocessing.cpu_count(), help='Number of processes to use (default: number of CPU cores).')
-    parser.add_argument('-f', '--format', choices=['excel', 'csv', 'json'], default='excel', help='Output format (default: excel).')
+    parser.add_argument('-cs', '--chunk_size', type=int, default=1000, help='Number of rows per comparison task; large sheets are split across processes (default: 1000).')
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(), help='Number of processes to use (default: number of CPU cores).')
+    parser.add_argument('-f', '--format', choices=['excel', 'csv', 'json', 'jsonl', 'parquet', 'feather'], default='excel', help='Output format (default: excel).')
+    parser.add_argument('-k', '--key_column', nargs='+', default=None, help='Column(s) identifying a row; rows are matched by key instead of position (e.g. -k "Function ID").')
+    parser.add_argument('-u', '--include_unchanged', action='store_true', help='Also report identical cells as "No change".')
+    parser.add_argument('-cd', '--cache_dir', type=str, default=None, help='Directory for caching parsed sheets between runs, stored as Feather; requires pyarrow (default: no cache).')
+    parser.add_argument('-csz', '--cache_size_mb', type=int, default=1024, help='Maximum cache size in megabytes (default: 1024).')
+    parser.add_argument('-rm', '--read_mode', choices=['values', 'formulas', 'both'], default='values', help='Compare cached values, formulas, or both (default: values).')
+    parser.add_argument('-e', '--engine', choices=['pandas', 'stream'], default='pandas', help='"stream" compares rows by position in bounded memory, for very large sheets; no key matching, move detection or incremental state (default: pandas).')
+    parser.add_argument('-em', '--expand_merged', action='store_true', help='Fill every cell of a merged range with its value, so merged and unmerged layouts compare equal.')
+    parser.add_argument('-dr', '--detect_renames', action='store_true', help='Report a dropped and an added column with matching contents as a renamed column.')
+    parser.add_argument('-cf', '--conditional_format', action='store_true', help='Colour Excel report rows with conditional formatting instead of per-cell fills.')
+    parser.add_argument('-sc', '--scorer', choices=list(SCORERS), default='sequencematcher', help='Similarity scorer for changed cells; "indel" is faster and uses rapidfuzz when installed (default: sequencematcher).')
+    parser.add_argument('-inc', '--incremental', type=str, default=None, metavar='STATE_DIR', help='Keep the parsed second file in STATE_DIR (as Feather; requires pyarrow) and compare the next run against it instead of --file1.')
+    parser.add_argument('-w', '--watch', type=str, default=None, metavar='DIR', help='With --incremental, watch DIR for new snapshots and compare each against the previous one; --output is then a directory.')
+    parser.add_argument('-pi', '--poll_interval', type=float, default=60, help='Seconds between polls of the watched directory (default: 60).')
+    parser.add_argument('-b', '--batch', type=str, default=None, metavar='MANIFEST', help='Compare every pair listed in a CSV or JSON manifest (file1, file2, output) on one shared process pool.')
+    parser.add_argument('-bs', '--batch_summary', type=str, default=None, help='Path of the batch summary (default: <manifest>_summary.json).')
+    parser.add_argument('-bc', '--batch_concurrency', type=int, default=2, help='Number of pairs compared at the same time in batch mode (default: 2).')
+    parser.add_argument('-pf', '--profile', type=str, default=None, help='Save per-stage, per-sheet and per-worker timings, counts and memory to this JSON file.')
+    parser.add_argument('-cp', '--cprofile_dir', type=str, default=None, help='Save a cProfile dump per worker process (and main.prof for the main process) to this directory.')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose logging.')
 
     args = parser.parse_args()
@@ -465,13 +2498,82 @@ def main():
         logger.error("Minor threshold must be greater than major threshold.")
         sys.exit(1)
 
-    # Set default file paths if not provided
-    file1_path = args.file1 or 'source1.xlsx'
+    # Parquet and Feather output rely on the optional pyarrow package
+    if args.format in ('parquet', 'feather') and importlib.util.find_spec('pyarrow') is None:
+        logger.error(f"{args.format.capitalize()} output requires pyarrow (pip install pyarrow).")
+        sys.exit(1)
+    # So do the sheet cache and the incremental state, which store sheets as Feather
+    if (args.cache_dir or args.incremental) and importlib.util.find_spec('pyarrow') is None:
+        logger.error("--cache_dir and --incremental require pyarrow (pip install pyarrow).")
+        sys.exit(1)
+
+    if args.watch and not args.incremental:
+        logger.error("--watch requires --incremental.")
+        sys.exit(1)
+    if args.batch and (args.incremental or args.watch):
+        logger.error("--batch cannot be combined with --incremental or --watch.")
+        sys.exit(1)
+    if args.engine == 'stream':
+        if args.incremental or args.key_column:
+            logger.error("--incremental and --key_column are not supported by the stream engine.")
+            sys.exit(1)
+        if args.detect_renames:
+            logger.warning("The stream engine compares rows by position; --detect_renames is ignored.")
+
+    options = dict(
+        minor_threshold=args.minor_threshold,
+        major_threshold=args.major_threshold,
+        ignore_sheets=args.ignore_sheets,
+        chunk_size=args.chunk_size,
+        num_processes=args.processes,
+        output_format=args.format,
+        key_columns=args.key_column,
+        include_unchanged=args.include_unchanged,
+        cache_dir=args.cache_dir,
+        cache_size_mb=args.cache_size_mb,
+        conditional_fill=args.conditional_format,
+        scorer=args.scorer,
+        profile_path=args.profile,
+        cprofile_dir=args.cprofile_dir,
+        detect_renames=args.detect_renames,
+        read_mode=args.read_mode,
+        engine=args.engine,
+        expand_merged=args.expand_merged
+    )
+
+    if args.watch:
+        if not os.path.isdir(args.watch):
+            logger.error(f"Directory not found: {args.watch}")
+            sys.exit(1)
+        output_dir = args.output or args.watch
+        os.makedirs(output_dir, exist_ok=True)
+        logger.info(f"Watching {args.watch} for new snapshots every {args.poll_interval}s; reports go to {output_dir}")
+        try:
+            watch_snapshots(args.watch, args.incremental, output_dir, args.poll_interval, **options)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
+        return
+
+    if args.batch:
+        try:
+            pairs = read_batch_manifest(args.batch)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read batch manifest: {e}")
+            sys.exit(1)
+        summary_path = args.batch_summary or f"{os.path.splitext(args.batch)[0]}_summary.json"
+        logger.info(f"Comparing {len(pairs)} pair(s) from {args.batch}, {args.batch_concurrency} at a time")
+        summary = run_batch(pairs, summary_path, args.batch_concurrency, **options)
+        if any(entry['status'] != 'ok' for entry in summary):
+            sys.exit(1)
+        return
+
+    # Set default file paths if not provided; incremental runs take the first file from the stored snapshot
+    file1_path = args.file1 if args.incremental else args.file1 or 'source1.xlsx'
     file2_path = args.file2 or 'source2.xlsx'
     output_path = args.output or 'comparison_output.xlsx'
 
     # Validate file paths
-    if not os.path.exists(file1_path):
+    if file1_path and not os.path.exists(file1_path):
         logger.error(f"File not found: {file1_path}")
         sys.exit(1)
     if not os.path.exists(file2_path):
@@ -479,29 +2581,40 @@ def main():
         sys.exit(1)
 
     # Log configurations
-    logger.info(f"Comparing {file1_path} and {file2_path}")
+    if file1_path:
+        logger.info(f"Comparing {file1_path} and {file2_path}")
     logger.info(f"Output will be saved to {output_path}")
     logger.info(f"Minor change threshold: {args.minor_threshold}")
     logger.info(f"Major change threshold: {args.major_threshold}")
     logger.info(f"Chunk size: {args.chunk_size}")
     logger.info(f"Number of processes: {args.processes}")
     logger.info(f"Output format: {args.format}")
+    logger.info(f"Similarity scorer: {args.scorer}")
+    logger.info(f"Engine: {args.engine}, comparing {args.read_mode}")
+    if args.key_column:
+        logger.info(f"Key column(s): {', '.join(args.key_column)}")
+    if args.cache_dir:
+        logger.info(f"Cache directory: {args.cache_dir} (max {args.cache_size_mb} MB)")
+    if args.incremental:
+        logger.info(f"Incremental state directory: {args.incremental}")
     if args.ignore_sheets:
         logger.info(f"Ignoring sheets: {', '.join(args.ignore_sheets)}")
 
     # Run the comparison
     try:
+        profiler = cProfile.Profile() if args.cprofile_dir else None
+        if profiler is not None:
+            profiler.enable()
         compare_excel_files(
             file1_path=file1_path,
             file2_path=file2_path,
             output_path=output_path,
-            minor_threshold=args.minor_threshold,
-            major_threshold=args.major_threshold,
-            ignore_sheets=args.ignore_sheets,
-            chunk_size=args.chunk_size,
-            num_processes=args.processes,
-            output_format=args.format
+            state_dir=args.incremental,
+            **options
         )
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(args.cprofile_dir, 'main.prof'))
         logger.info("Comparison completed successfully.")
     except Exception as e:
         logger.error(f"An error occurred during comparison: {e}")
@@ -0,0 +1,602 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import json
+import shutil
+import platform
+import argparse
+import collections
+import logging
+import tempfile
+import subprocess
+import importlib.util
+import multiprocessing
+from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+import Compare
+
+# Writers benchmarked for the write stage, keyed by output format
+WRITERS = {
+    'excel': lambda results, path, file1, file2: Compare.generate_excel_output(results, path, file1, file2),
+    'csv': lambda results, path, file1, file2: Compare.generate_csv_output(results, path),
+    'json': lambda results, path, file1, file2: Compare.generate_json_output(results, path),
+    'jsonl': lambda results, path, file1, file2: Compare.generate_jsonl_output(results, path),
+    'parquet': lambda results, path, file1, file2: Compare.generate_arrow_output(results, path, 'parquet'),
+    'feather': lambda results, path, file1, file2: Compare.generate_arrow_output(results, path, 'feather'),
+}
+
+# Modules that importing Compare must leave to the code paths that need them
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'tqdm', 'pyarrow']
+
+# Sheet holding the function details, as expected by compare_excel_files
+FUNCTION_DETAILS_SHEET = 'Core OCIR Data'
+
+WORDS = ['control', 'review', 'owner', 'process', 'risk', 'monthly', 'report', 'approval', 'system', 'access',
+         'reconciliation', 'ledger', 'exception', 'policy', 'vendor', 'payment', 'audit', 'evidence', 'quarterly', 'team']
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def random_text(rng: np.random.Generator, count: int, text_length: int) -> np.ndarray:
+    """
+    Generate random sentences of roughly the given length.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        count (int): Number of sentences.
+        text_length (int): Approximate number of characters per sentence.
+
+    Returns:
+        np.ndarray: Object array of sentences.
+    """
+    words_per_text = max(1, text_length // 7)
+    words = rng.choice(WORDS, size=(count, words_per_text))
+    return np.array([' '.join(row)[:text_length] for row in words], dtype=object)
+
+def generate_sheet(rng: np.random.Generator, rows: int, columns: int, text_length: int) -> pd.DataFrame:
+    """
+    Generate one synthetic sheet: a Function ID column followed by alternating text and numeric columns.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        rows (int): Number of data rows.
+        columns (int): Number of columns, including the Function ID column.
+        text_length (int): Approximate number of characters per text cell.
+
+    Returns:
+        pd.DataFrame: The sheet.
+    """
+    data = {'Function ID': [f"F{i:07d}" for i in range(rows)]}
+    for c in range(1, columns):
+        if c % 2:
+            data[f"Text {c}"] = random_text(rng, rows, text_length)
+        else:
+            data[f"Value {c}"] = rng.integers(0, 100000, rows)
+    return pd.DataFrame(data)
+
+def mutate_sheet(rng: np.random.Generator, sheet: pd.DataFrame, change_rate: float, insert_rate: float, text_length: int) -> pd.DataFrame:
+    """
+    Derive the next snapshot of a sheet: change cells, then delete and insert rows.
+
+    Half of the changed text cells get a small edit and half are rewritten, so both minor and
+    major changes are produced.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        sheet (pd.DataFrame): The original sheet.
+        change_rate (float): Fraction of non-key cells to change.
+        insert_rate (float): Fraction of rows to delete, and the same fraction to insert.
+        text_length (int): Approximate number of characters per inserted text cell.
+
+    Returns:
+        pd.DataFrame: The changed sheet.
+    """
+    changed = sheet.copy()
+    for column in changed.columns[1:]:
+        values = changed[column].to_numpy(copy=True)
+        positions = np.flatnonzero(rng.random(len(values)) < change_rate)
+        if column.startswith('Text'):
+            for i, position in enumerate(positions):
+                values[position] = values[position][:-3] + 'xyz' if i % 2 else random_text(rng, 1, text_length)[0]
+        else:
+            values[positions] = rng.integers(0, 100000, len(positions))
+        changed[column] = values
+
+    row_changes = int(len(changed) * insert_rate)
+    if row_changes:
+        changed = changed.drop(index=rng.choice(changed.index, row_changes, replace=False))
+        inserted = generate_sheet(rng, row_changes, len(sheet.columns), text_length)
+        inserted['Function ID'] = [f"N{i:07d}" for i in range(row_changes)]
+        # Each inserted row sorts just before a random surviving row (or after the last one)
+        order = np.concatenate([np.arange(len(changed)), rng.integers(0, len(changed) + 1, row_changes) - 0.5])
+        changed = pd.concat([changed, inserted]).iloc[np.argsort(order, kind='stable')]
+    return changed.reset_index(drop=True)
+
+def write_workbook(path: str, sheets: Dict[str, pd.DataFrame], merged_rate: float, rng: np.random.Generator) -> None:
+    """
+    Write sheets to a workbook, merging the first two data cells of a fraction of the rows.
+
+    Args:
+        path (str): Path of the workbook.
+        sheets (Dict[str, pd.DataFrame]): Sheet name to sheet.
+        merged_rate (float): Fraction of rows with a merged range.
+        rng (np.random.Generator): Random number generator.
+    """
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, sheet in sheets.items():
+            sheet.to_excel(writer, sheet_name=sheet_name, index=False)
+            if merged_rate and sheet_name != FUNCTION_DETAILS_SHEET and len(sheet.columns) > 2:
+                worksheet = writer.sheets[sheet_name]
+                for position in np.flatnonzero(rng.random(len(sheet)) < merged_rate):
+                    worksheet.merge_cells(start_row=position + 2, start_column=2, end_row=position + 2, end_column=3)
+
+def generate_workbooks(
+    directory: str,
+    sheets: int,
+    rows: int,
+    columns: int,
+    change_rate: float,
+    insert_rate: float,
+    merged_rate: float,
+    text_length: int,
+    seed: int = 0
+) -> Tuple[str, str]:
+    """
+    Generate a pair of synthetic workbooks in the layout Compare.py expects.
+
+    Both workbooks start with a 'Core OCIR Data' sheet of function details, followed by the
+    data sheets. The second workbook is the first one with changed cells and inserted and
+    deleted rows.
+
+    Args:
+        directory (str): Directory to write the workbooks to.
+        sheets (int): Number of data sheets.
+        rows (int): Number of rows per data sheet.
+        columns (int): Number of columns per data sheet.
+        change_rate (float): Fraction of cells changed in the second workbook.
+        insert_rate (float): Fraction of rows deleted, and inserted, in the second workbook.
+        merged_rate (float): Fraction of rows with a merged range.
+        text_length (int): Approximate number of characters per text cell.
+        seed (int): Random seed.
+
+    Returns:
+        Tuple[str, str]: Paths of the first and second workbooks.
+    """
+    rng = np.random.default_rng(seed)
+    details = pd.DataFrame({
+        'Function ID': [f"F{i:07d}" for i in range(rows)],
+        'Function Name': random_text(rng, rows, 20),
+        'Owner': rng.choice(['Alice', 'Bob', 'Carol', 'Dan'], rows),
+    })
+    sheets1 = {FUNCTION_DETAILS_SHEET: details}
+    sheets2 = {FUNCTION_DETAILS_SHEET: details}
+    for i in range(sheets):
+        sheet = generate_sheet(rng, rows, columns, text_length)
+        sheets1[f"Sheet {i + 1}"] = sheet
+        sheets2[f"Sheet {i + 1}"] = mutate_sheet(rng, sheet, change_rate, insert_rate, text_length)
+
+    file1_path = os.path.join(directory, 'benchmark_1.xlsx')
+    file2_path = os.path.join(directory, 'benchmark_2.xlsx')
+    write_workbook(file1_path, sheets1, merged_rate, rng)
+    write_workbook(file2_path, sheets2, merged_rate, rng)
+    return file1_path, file2_path
+
+def timed(function, *args, **kwargs) -> Tuple[object, float]:
+    """
+    Call a function and measure its wall time.
+
+    Returns:
+        Tuple[object, float]: The function's result and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def benchmark_stages(file1_path: str, file2_path: str, processes: int, options: Dict, work_dir: str) -> Tuple[List[Dict], List[Tuple]]:
+    """
+    Time the load, align and compare stages the way compare_excel_files runs them.
+
+    Args:
+        file1_path (str): Path of the first workbook.
+        file2_path (str): Path of the second workbook.
+        processes (int): Number of worker processes.
+        options (Dict): Comparison options (thresholds, chunk size, key columns, scorer).
+        work_dir (str): Directory for spill files.
+
+    Returns:
+        Tuple[List[Dict], List[Tuple]]: Timing records and the comparison results.
+    """
+    sheet_names = [sheet for sheet in Compare.list_sheet_names(file1_path) if sheet != FUNCTION_DETAILS_SHEET]
+    records = []
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        (loaded1, loaded2), seconds = timed(lambda: list(executor.map(Compare.load_workbook_sheets, [
+            (file1_path, sheet_names + [FUNCTION_DETAILS_SHEET], None, 0, 'values', options['expand_merged']),
+            (file2_path, sheet_names, None, 0, 'values', options['expand_merged'])
+        ])))
+        rows = sum(len(loaded2[sheet][0]) for sheet in sheet_names)
+        records.append({'stage': 'load', 'processes': processes, 'seconds': seconds, 'rows': rows})
+
+        function_details = Compare.get_function_details(loaded1[FUNCTION_DETAILS_SHEET][0], 'Function ID')
+        args_list = [(sheet, loaded1[sheet][0], loaded2[sheet][0], loaded1[sheet][1], loaded2[sheet][1], function_details, options['key_columns'], False, False) for sheet in sheet_names]
+        aligned, seconds = timed(lambda: list(executor.map(Compare.process_sheet, args_list)))
+        records.append({'stage': 'align', 'processes': processes, 'seconds': seconds, 'rows': rows})
+
+        spill_dir = tempfile.mkdtemp(prefix='spill_', dir=work_dir)
+        try:
+            def compare():
+                tasks = ((Compare.process_chunk, args, None) for args in Compare.schedule_chunks(aligned, options['chunk_size'], options['minor_threshold'], options['major_threshold'], function_details, False, options['scorer'], spill_dir))
+                return list(Compare.iter_results(aligned, Compare.run_bounded(executor, tasks, 2 * processes), options['chunk_size']))
+            results, seconds = timed(compare)
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+        records.append({'stage': 'compare', 'processes': processes, 'seconds': seconds, 'rows': rows, 'results': len(results)})
+
+    # The serial path, for a baseline independent of process count
+    if processes == 1:
+        def compare_serial():
+            return sum(len(Compare.compare_sheets(
+                loaded1[sheet][0], loaded2[sheet][0], sheet, options['minor_threshold'], options['major_threshold'], options['chunk_size'], function_details,
+                key_columns=options['key_columns'], fingerprints1=loaded1[sheet][1], fingerprints2=loaded2[sheet][1], scorer=options['scorer']
+            )) for sheet in sheet_names)
+        count, seconds = timed(compare_serial)
+        records.append({'stage': 'compare_sheets', 'processes': 1, 'seconds': seconds, 'rows': rows, 'results': count})
+
+    return records, results
+
+def benchmark_compare_chunks(row_counts: List[int], columns: int, change_rate: float, text_length: int, options: Dict, seed: int, repeats: int = 3) -> List[Dict]:
+    """
+    Time compare_chunks on growing blocks at a fixed change rate, to check that it scales linearly.
+
+    Each block is the first rows of one generated sheet compared with a copy whose cells were
+    changed at change_rate, with no inserted rows, so the share of cells reaching the scorer is
+    the same at every size. Linear scaling shows as a flat time per cell across the sizes.
+
+    Args:
+        row_counts (List[int]): Block sizes in rows.
+        columns (int): Columns per block.
+        change_rate (float): Fraction of cells changed.
+        text_length (int): Approximate number of characters per text cell.
+        options (Dict): Comparison options (thresholds, scorer).
+        seed (int): Random seed.
+        repeats (int): Runs per size; the fastest is kept.
+
+    Returns:
+        List[Dict]: Timing records.
+    """
+    rng = np.random.default_rng(seed)
+    sheet1 = generate_sheet(rng, max(row_counts), columns, text_length)
+    sheet2 = mutate_sheet(rng, sheet1, change_rate, 0.0, text_length)
+
+    # One untimed run first, so lazy imports and scorer set-up are not charged to the smallest block
+    Compare.compare_chunks(sheet1.iloc[:min(row_counts)], sheet2.iloc[:min(row_counts)], 'Sheet', options['minor_threshold'], options['major_threshold'], {}, scorer=options['scorer'])
+
+    records = []
+    for rows in sorted(row_counts):
+        chunk1, chunk2 = sheet1.iloc[:rows], sheet2.iloc[:rows]
+        seconds = min(timed(
+            Compare.compare_chunks, chunk1, chunk2, 'Sheet', options['minor_threshold'], options['major_threshold'], {}, scorer=options['scorer']
+        )[1] for _ in range(repeats))
+        cells = rows * columns
+        records.append({'stage': 'compare_chunks', 'rows': rows, 'cells': cells, 'seconds': seconds, 'us_per_cell': seconds / cells * 1e6})
+
+    # Time per cell relative to the smallest block; values near 1 mean linear scaling
+    for record in records:
+        record['per_cell_ratio'] = record['us_per_cell'] / records[0]['us_per_cell']
+    return records
+
+def benchmark_writers(results: List[Tuple], formats: List[str], file1_path: str, file2_path: str, work_dir: str) -> List[Dict]:
+    """
+    Time each report writer on the same results.
+
+    Args:
+        results (List[Tuple]): Comparison results.
+        formats (List[str]): Output formats to benchmark.
+        file1_path (str): Path of the first workbook, for the Excel report header.
+        file2_path (str): Path of the second workbook, for the Excel report header.
+        work_dir (str): Directory for the reports.
+
+    Returns:
+        List[Dict]: Timing records, including the size of each report.
+    """
+    records = []
+    for output_format in formats:
+        output_path = os.path.join(work_dir, f"report.{Compare.OUTPUT_EXTENSIONS[output_format]}")
+        _, seconds = timed(WRITERS[output_format], iter(results), output_path, file1_path, file2_path)
+        records.append({'stage': 'write', 'format': output_format, 'seconds': seconds, 'results': len(results), 'bytes': os.path.getsize(output_path)})
+        os.remove(output_path)
+    return records
+
+def benchmark_end_to_end(file1_path: str, file2_path: str, processes: int, formats: List[str], options: Dict, work_dir: str) -> List[Dict]:
+    """
+    Time complete compare_excel_files runs, one per output format.
+
+    Args:
+        file1_path (str): Path of the first workbook.
+        file2_path (str): Path of the second workbook.
+        processes (int): Number of worker processes.
+        formats (List[str]): Output formats to benchmark.
+        options (Dict): Comparison options (thresholds, chunk size, key columns, scorer).
+        work_dir (str): Directory for the reports.
+
+    Returns:
+        List[Dict]: Timing records.
+    """
+    records = []
+    for output_format in formats:
+        output_path = os.path.join(work_dir, f"end_to_end.{Compare.OUTPUT_EXTENSIONS[output_format]}")
+        _, seconds = timed(
+            Compare.compare_excel_files, file1_path, file2_path, output_path,
+            minor_threshold=options['minor_threshold'], major_threshold=options['major_threshold'], ignore_sheets=[],
+            chunk_size=options['chunk_size'], num_processes=processes, output_format=output_format,
+            key_columns=options['key_columns'], scorer=options['scorer'], expand_merged=options['expand_merged']
+        )
+        records.append({'stage': 'end_to_end', 'processes': processes, 'format': output_format, 'seconds': seconds})
+        os.remove(output_path)
+    return records
+
+def benchmark_startup(repeats: int) -> List[Dict]:
+    """
+    Time a fresh interpreter importing Compare and running `Compare.py --help`.
+
+    Each run is a new process, so nothing is cached between them; the fastest of `repeats`
+    runs is reported. The import is traced with `-X importtime` to list the heavy modules it
+    pulled in, which should be none.
+
+    Args:
+        repeats (int): Number of runs of each measurement.
+
+    Returns:
+        List[Dict]: Timing records.
+    """
+    compare_dir = os.path.dirname(os.path.abspath(Compare.__file__))
+    import_seconds, help_seconds, heavy = [], [], set()
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import Compare'], cwd=compare_dir, capture_output=True, text=True, check=True)
+        for line in completed.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split('|')
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            name = fields[2].strip()
+            if name == 'Compare':
+                import_seconds.append(int(fields[1]) / 1e6)
+            elif name.split('.')[0] in HEAVY_MODULES:
+                heavy.add(name.split('.')[0])
+        _, seconds = timed(subprocess.run, [sys.executable, os.path.join(compare_dir, 'Compare.py'), '--help'], capture_output=True, check=True)
+        help_seconds.append(seconds)
+    return [
+        {'stage': 'import', 'seconds': min(import_seconds), 'heavy_modules': sorted(heavy)},
+        {'stage': 'help', 'seconds': min(help_seconds)},
+    ]
+
+def random_string_pairs(rng: np.random.Generator, count: int, text_length: int) -> List[Tuple[str, str]]:
+    """
+    Generate string pairs spanning every change category, from untouched to unrelated.
+
+    Each pair is a random sentence and a copy of it with a random share of its characters
+    substituted, inserted or deleted, plus case and whitespace noise; a few pairs are
+    unrelated sentences, empty strings or numbers.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        count (int): Number of pairs.
+        text_length (int): Approximate number of characters per sentence.
+
+    Returns:
+        List[Tuple[str, str]]: The string pairs.
+    """
+    alphabet = list('abcdefghijklmnopqrstuvwxyz0123456789 -')
+    texts = random_text(rng, 2 * count, text_length)
+    pairs = []
+    for i in range(count):
+        base = str(texts[i]) if rng.random() < 0.9 else str(rng.integers(0, 10 ** 6))
+        text = list(base)
+        edits = int(len(text) * rng.choice([0.0, 0.02, 0.1, 0.3, 0.6, 1.0]))
+        for _ in range(edits):
+            position = int(rng.integers(0, len(text) + 1))
+            operation = rng.integers(0, 3)
+            if operation == 0 and position < len(text):
+                text[position] = rng.choice(alphabet)
+            elif operation == 1:
+                text.insert(position, rng.choice(alphabet))
+            elif position < len(text):
+                del text[position]
+        other = ''.join(text)
+        if rng.random() < 0.2:
+            other = f"  {other.upper()} "
+        if rng.random() < 0.05:
+            other = texts[count + i] if rng.random() < 0.8 else ''
+        pairs.append((base, other))
+    return pairs
+
+def lcs_length(s1: str, s2: str) -> int:
+    """
+    Length of the longest common subsequence by the textbook dynamic program, as a reference.
+    """
+    previous = [0] * (len(s2) + 1)
+    for char in s1:
+        current = [0]
+        for j, other in enumerate(s2):
+            current.append(previous[j] + 1 if char == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+def check_scorer_parity(count: int, seed: int, text_length: int, minor_threshold: float, major_threshold: float) -> List[Dict]:
+    """
+    Check the similarity scorers against plain difflib on random string pairs.
+
+    Required checks, which must have no mismatches:
+        sequencematcher: Compare.compare_strings with its early exit at the major threshold, as
+            compare_chunks calls it, gives the same category as SequenceMatcher.ratio() did
+            before scorers were pluggable.
+        indel_early_exit: the indel scorer gives the same category with and without its early exit.
+        indel_ratio: the indel ratio equals 2 * LCS / (len1 + len2), with the LCS from a reference
+            dynamic program, whether rapidfuzz or the bit-parallel fallback computes it.
+        indel_not_stricter: the indel ratio is never below SequenceMatcher's, whose matching
+            blocks are a common subsequence, so indel can only report a milder category.
+    The share of pairs where indel and SequenceMatcher agree on the category is reported as well;
+    they are different measures, so it is informational.
+
+    Args:
+        count (int): Number of random string pairs.
+        seed (int): Random seed.
+        text_length (int): Approximate number of characters per string.
+        minor_threshold (float): Threshold for minor changes.
+        major_threshold (float): Threshold for major changes.
+
+    Returns:
+        List[Dict]: One record per check with the number of pairs and mismatches.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = random_string_pairs(rng, count, text_length)
+    mismatches = {'sequencematcher': 0, 'indel_early_exit': 0, 'indel_ratio': 0, 'indel_not_stricter': 0, 'indel_vs_sequencematcher': 0}
+    categories = collections.Counter()
+    for value1, value2 in pairs:
+        s1, s2 = value1.strip().lower(), value2.strip().lower()
+        reference_ratio = SequenceMatcher(None, s1, s2).ratio()
+        reference = Compare.categorize_change(reference_ratio, minor_threshold, major_threshold)
+        categories[reference] += 1
+        fast = Compare.categorize_change(Compare.compare_strings(value1, value2, 'sequencematcher', major_threshold), minor_threshold, major_threshold)
+        mismatches['sequencematcher'] += fast != reference
+
+        indel_ratio = Compare.indel_ratio(s1, s2)
+        indel = Compare.categorize_change(indel_ratio, minor_threshold, major_threshold)
+        indel_fast = Compare.categorize_change(Compare.compare_strings(value1, value2, 'indel', major_threshold), minor_threshold, major_threshold)
+        mismatches['indel_early_exit'] += indel_fast != indel
+        expected = 2 * lcs_length(s1, s2) / (len(s1) + len(s2)) if s1 or s2 else 1.0
+        mismatches['indel_ratio'] += abs(indel_ratio - expected) > 1e-9
+        mismatches['indel_not_stricter'] += indel_ratio < reference_ratio - 1e-9
+        mismatches['indel_vs_sequencematcher'] += indel != reference
+
+    logger.info(f"Scorer parity pairs by SequenceMatcher category: {dict(categories)}")
+    return [
+        {'stage': 'parity', 'check': check, 'pairs': count, 'mismatches': mismatches[check], 'required': check != 'indel_vs_sequencematcher'}
+        for check in mismatches
+    ]
+
+def environment() -> Dict[str, object]:
+    """
+    Describe the machine and library versions, so results from different runs can be told apart.
+    """
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'openpyxl': openpyxl.__version__,
+        'rapidfuzz': Compare.rapidfuzz_fuzz is not None,
+    }
+
+def main():
+    """
+    Main function to handle command-line arguments and run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Compare.py on synthetic workbooks.')
+    parser.add_argument('-s', '--sheets', type=int, default=3, help='Number of data sheets (default: 3).')
+    parser.add_argument('-r', '--rows', type=int, default=5000, help='Rows per sheet (default: 5000).')
+    parser.add_argument('-c', '--columns', type=int, default=10, help='Columns per sheet (default: 10).')
+    parser.add_argument('-cr', '--change_rate', type=float, default=0.05, help='Fraction of cells changed (default: 0.05).')
+    parser.add_argument('-ir', '--insert_rate', type=float, default=0.01, help='Fraction of rows deleted and inserted (default: 0.01).')
+    parser.add_argument('-mr', '--merged_rate', type=float, default=0.0, help='Fraction of rows with a merged range (default: 0).')
+    parser.add_argument('-tl', '--text_length', type=int, default=40, help='Characters per text cell (default: 40).')
+    parser.add_argument('-p', '--processes', type=int, nargs='+', default=[1, multiprocessing.cpu_count()], help='Process counts to benchmark (default: 1 and the number of CPU cores).')
+    parser.add_argument('-f', '--formats', nargs='+', choices=list(WRITERS), default=None, help='Output formats to benchmark (default: all available).')
+    parser.add_argument('-k', '--key_column', nargs='+', default=None, help='Key column(s), e.g. -k "Function ID" (default: compare by position).')
+    parser.add_argument('-cs', '--chunk_size', type=int, default=1000, help='Rows per comparison task (default: 1000).')
+    parser.add_argument('-sc', '--scorer', choices=list(Compare.SCORERS), default='sequencematcher', help='Similarity scorer (default: sequencematcher).')
+    parser.add_argument('-em', '--expand_merged', action='store_true', help='Fill merged ranges when loading, as Compare.py --expand_merged does.')
+    parser.add_argument('-e', '--end_to_end', action='store_true', help='Also time complete compare_excel_files runs for every format and process count.')
+    parser.add_argument('-seed', '--seed', type=int, default=0, help='Random seed (default: 0).')
+    parser.add_argument('-w', '--work_dir', type=str, default=None, help='Keep the generated workbooks in this directory (default: a temporary directory).')
+    parser.add_argument('-sr', '--startup_repeats', type=int, default=5, help='Runs of each start-up measurement (default: 5).')
+    parser.add_argument('-so', '--startup_only', action='store_true', help='Only benchmark start-up: importing Compare and Compare.py --help.')
+    parser.add_argument('-mi', '--max_import_seconds', type=float, default=None, help='Exit with an error if importing Compare takes longer than this or imports a heavy module.')
+    parser.add_argument('-pp', '--parity_pairs', type=int, default=2000, help='Random string pairs for the scorer parity check (default: 2000; 0 skips it).')
+    parser.add_argument('-po', '--parity_only', action='store_true', help='Only run the scorer parity check.')
+    parser.add_argument('-cc', '--chunk_rows', type=int, nargs='+', default=[1000, 2000, 4000, 8000, 16000], help='Block sizes in rows for the compare_chunks scaling benchmark (default: 1000 to 16000; 0 skips it).')
+    parser.add_argument('-co', '--chunks_only', action='store_true', help='Only run the compare_chunks scaling benchmark.')
+    parser.add_argument('-o', '--output', type=str, default='benchmark_results.json', help='Path of the results file (default: benchmark_results.json).')
+
+    args = parser.parse_args()
+
+    formats = args.formats or [f for f in WRITERS if f not in ('parquet', 'feather') or importlib.util.find_spec('pyarrow') is not None]
+    options = {
+        'minor_threshold': 0.8,
+        'major_threshold': 0.5,
+        'chunk_size': args.chunk_size,
+        'key_columns': args.key_column,
+        'scorer': args.scorer,
+        'expand_merged': args.expand_merged,
+    }
+
+    chunk_rows = [rows for rows in args.chunk_rows if rows > 0]
+    records = []
+    if not (args.parity_only or args.chunks_only):
+        records.extend(benchmark_startup(args.startup_repeats))
+    if args.parity_pairs and not (args.startup_only or args.chunks_only):
+        records.extend(check_scorer_parity(args.parity_pairs, args.seed, args.text_length, options['minor_threshold'], options['major_threshold']))
+    if chunk_rows and not (args.startup_only or args.parity_only):
+        records.extend(benchmark_compare_chunks(chunk_rows, args.columns, args.change_rate, args.text_length, options, args.seed))
+    if args.startup_only or args.parity_only or args.chunks_only:
+        finish(args, records)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='compare_benchmark_')
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        (file1_path, file2_path), seconds = timed(
+            generate_workbooks, work_dir, args.sheets, args.rows, args.columns,
+            args.change_rate, args.insert_rate, args.merged_rate, args.text_length, args.seed
+        )
+        logger.info(f"Generated {file1_path} and {file2_path} in {seconds:.1f}s")
+
+        results = None
+        for processes in args.processes:
+            stage_records, results = benchmark_stages(file1_path, file2_path, processes, options, work_dir)
+            records.extend(stage_records)
+            if args.end_to_end:
+                records.extend(benchmark_end_to_end(file1_path, file2_path, processes, formats, options, work_dir))
+        records.extend(benchmark_writers(results, formats, file1_path, file2_path, work_dir))
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    finish(args, records)
+
+def finish(args: argparse.Namespace, records: List[Dict]) -> None:
+    """
+    Log and save the benchmark records, then fail on a scorer parity mismatch or a start-up regression.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+        records (List[Dict]): Timing records.
+    """
+    for record in records:
+        logger.info(' '.join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}" for key, value in record.items()))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'config': vars(args), 'environment': environment(), 'results': records}, f, indent=2)
+    logger.info(f"Benchmark results saved to {args.output}")
+
+    failed_checks = [record['check'] for record in records if record['stage'] == 'parity' and record['required'] and record['mismatches']]
+    if failed_checks:
+        logger.error(f"Scorer parity check(s) failed: {', '.join(failed_checks)}")
+        sys.exit(1)
+
+    startup = next((record for record in records if record['stage'] == 'import'), None)
+    if args.max_import_seconds is not None and startup is not None:
+        if startup['heavy_modules']:
+            logger.error(f"Importing Compare pulled in {', '.join(startup['heavy_modules'])}")
+            sys.exit(1)
+        if startup['seconds'] > args.max_import_seconds:
+            logger.error(f"Importing Compare took {startup['seconds']:.3f}s, over the {args.max_import_seconds:.3f}s limit")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
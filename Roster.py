@@ -1,8 +1,14 @@
 # Import necessary libraries
+import argparse                              # Used to read solver options from the command line.
+import os                                    # Used to remove the temporary solver log.
+import re                                    # Used to read the final MIP gap from the solver log.
+import tempfile                              # Used to create the temporary solver log.
 import calendar                              # Used for calendar-related operations, like finding number of days in a month.
 from datetime import datetime, timedelta     # Used for working with dates and times.
 import pandas as pd                          # Pandas is used to manage and process tabular data (like Excel tables).
-from pulp import LpProblem, LpMaximize, LpVariable, lpSum, LpBinary, LpInteger, LpStatus  
+import numpy as np                           # NumPy is used for the seat-by-day availability matrix.
+from pulp import LpProblem, LpMaximize, LpVariable, lpSum, LpBinary, LpInteger, LpStatus, value
+from pulp import LpSolutionOptimal, LpSolutionIntegerFeasible, PULP_CBC_CMD, HiGHS, HiGHS_CMD, GLPK_CMD
                                              # PuLP is used for formulating and solving linear programming problems (our ILP).
 from openpyxl import load_workbook, Workbook  # Openpyxl is used to read from and write to Excel workbooks.
 from openpyxl.styles import PatternFill, Font, Alignment  
@@ -82,6 +88,27 @@ def parse_days_string(days_str):
             day_set.update(["fri", "friday"])
     return day_set
 
+DAY_NUMBERS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4}  # Weekday numbers as used by datetime.weekday().
+
+def parse_weekdays(days_str):
+    """
+    Like parse_days_string, but returns the weekday numbers (Monday=0) instead of day names.
+    For example, "Mon, Wed" becomes frozenset({0, 2}).
+    """
+    return frozenset(DAY_NUMBERS[token] for token in parse_days_string(days_str) if token in DAY_NUMBERS)
+
+def weekday_matrix(days_column, working_dates):
+    """
+    Builds a boolean matrix with one row per entry of days_column (strings such as "Mon, Wed") and one column per
+    working date, True where the date falls on one of the listed days.
+    Each string is parsed once into a 5-day mask; the month is then a single NumPy lookup by weekday.
+    """
+    weekdays = np.array([d.weekday() for d in working_dates], dtype=int)
+    masks = np.zeros((len(days_column), 5), dtype=bool)
+    for i, days in enumerate(days_column.map(parse_weekdays)):
+        masks[i, list(days)] = True
+    return masks[:, weekdays]
+
 # ------------------------------
 # Functions for day descriptor matching
 # ------------------------------
@@ -139,6 +166,31 @@ def is_day_descriptor_match(date_obj, descriptor, working_dates):
         # Check if the date is the nth occurrence.
         return date_obj == same_wd[idx] if 0 <= idx < len(same_wd) else False
 
+def match_day_descriptors(df_special_days, working_dates):
+    """
+    Resolves the SpecialSubTeamDays table to the working dates its descriptors name.
+    Every descriptor is parsed once and looked up in a weekday/occurrence index of the month, instead of being
+    matched against every working date.
+    Returns a dictionary special[date] = (SubTeam, Descriptor). If several rows name the same date, the first row wins.
+    """
+    # index[(weekday, occurrence)] = date, with occurrence 0 for the first and "last" for the last one.
+    index = {}
+    for d, (wd, occ, is_last) in weekday_occurrences(working_dates).items():
+        index[(wd, occ)] = d
+        if is_last:
+            index[(wd, "last")] = d
+    special = {}
+    for sub_team, descriptor in zip(df_special_days["SubTeam"], df_special_days["DayDescriptor"]):
+        desc = str(descriptor).strip()
+        occ, wday = parse_day_descriptor(desc)
+        if not occ:
+            continue
+        # "1st" -> 0, "2nd" -> 1, ...; "last" stays as it is.
+        key = (DAY_NUMBERS[wday], "last" if occ == "last" else int(occ[:-2]) - 1)
+        if key in index and index[key] not in special:
+            special[index[key]] = (sub_team, desc)
+    return special
+
 # ------------------------------
 # Special History: Read previous month's special-day allocations
 # ------------------------------
@@ -157,22 +209,192 @@ def read_special_history(wb):
             data.append(row)
         # Create a DataFrame from the data.
         df = pd.DataFrame(data, columns=["Descriptor", "EmployeeID", "Allocation"])
-        hist = {}
-        # Populate the dictionary with keys as (Descriptor, EmployeeID).
-        for _, r in df.iterrows():
-            key = (r["Descriptor"], r["EmployeeID"])
-            hist[key] = r["Allocation"]
-        return hist
+        # Build the dictionary with keys as (Descriptor, EmployeeID); later rows win, as in the sheet order.
+        return dict(zip(zip(df["Descriptor"], df["EmployeeID"]), df["Allocation"]))
     except Exception:
         # If any error occurs (such as sheet not existing), return an empty dictionary.
         return {}
 
+# ------------------------------
+# Seat classes: concrete seats for pooled assignments
+# ------------------------------
+
+def assign_class_seats(pooled, seat_classes, working_dates):
+    """
+    Hands out concrete seat codes for the assignments the ILP made to pooled (interchangeable) seats.
+    pooled maps each working date to the list of employees given a pooled seat that day.
+    seat_classes maps an availability pattern (one True/False per working date) to the seat codes sharing it.
+    An employee keeps the seat they last sat in whenever it is free that day, so people move as little as possible.
+    Returns a dictionary mapping (EmployeeID, date) to a seat code.
+    """
+    assignment = {}
+    last_seat = {}
+    for i, d in enumerate(working_dates):
+        # Seats of every class available on this day, in seat code order.
+        free = sorted(code for pattern, codes in seat_classes.items() if pattern[i] for code in codes)
+        taken = set()
+        waiting = []
+        # First pass: give returning employees their previous seat.
+        for e in pooled.get(d, []):
+            s = last_seat.get(e)
+            if s in free and s not in taken:
+                assignment[(e, d)] = s
+                taken.add(s)
+            else:
+                waiting.append(e)
+        # Second pass: everyone else takes the next free seat. The class capacity constraint guarantees there is one.
+        remaining = (s for s in free if s not in taken)
+        for e in waiting:
+            assignment[(e, d)] = next(remaining)
+        for e in pooled.get(d, []):
+            last_seat[e] = assignment[(e, d)]
+    return assignment
+
+# ------------------------------
+# Solver selection and MIP gap reporting
+# ------------------------------
+
+SOLVERS = ["cbc", "highs", "glpk"]  # Solver backends generate_roster_schedule_ilp can use.
+
+def make_solver(name="cbc", time_limit=None, gap_rel=None, threads=None, msg=True, log_path=None, warm_start=False):
+    """
+    Builds the PuLP solver for the roster model.
+    - name: "cbc" (bundled with PuLP), "highs" (the highspy package or the highs binary) or "glpk" (the glpsol binary).
+    - time_limit: Seconds after which the solver stops and returns its best roster so far.
+    - gap_rel: Relative MIP gap (e.g., 0.01 for 1%) at which a roster is good enough to stop.
+    - threads: Number of solver threads. GLPK is single-threaded and ignores it.
+    - log_path: File the solver log is written to, so the final gap can be read back afterwards.
+    - warm_start: Pass the variables' initial values to the solver as a MIP start (CBC and the HiGHS binary only).
+    Raises ValueError if the solver is unknown or not installed.
+    """
+    name = name.lower()
+    if name == "cbc":
+        solver = PULP_CBC_CMD(msg=msg, timeLimit=time_limit, gapRel=gap_rel, threads=threads, logPath=log_path,
+                              warmStart=warm_start)
+    elif name == "highs":
+        # Prefer the highspy bindings and fall back to the command-line binary. The binary is also the only
+        # HiGHS interface PuLP can hand a MIP start to, so it is preferred for warm starts when installed.
+        solver = HiGHS(msg=msg, timeLimit=time_limit, gapRel=gap_rel, threads=threads)
+        if warm_start or not solver.available():
+            highs_cmd = HiGHS_CMD(msg=msg, timeLimit=time_limit, gapRel=gap_rel, threads=threads, logPath=log_path,
+                                  warmStart=warm_start)
+            if highs_cmd.available() or not solver.available():
+                solver = highs_cmd
+    elif name == "glpk":
+        # GLPK takes the gap tolerance and the log file as glpsol options.
+        options = ["--log", log_path] if log_path else []
+        if gap_rel is not None:
+            options += ["--mipgap", str(gap_rel)]
+        solver = GLPK_CMD(msg=msg, timeLimit=time_limit, options=options)
+    else:
+        raise ValueError(f"Unknown solver '{name}'. Choose one of: {', '.join(SOLVERS)}.")
+    if not solver.available():
+        raise ValueError(f"Solver '{name}' is not installed.")
+    return solver
+
+def read_mip_gap(model, solver, log_path):
+    """
+    Returns the relative gap (e.g., 0.02 for 2%) between the roster found and the solver's best bound,
+    or None if the solver did not report one.
+    The HiGHS bindings report it directly; for command-line solvers it is read from the end of the solver log.
+    """
+    if isinstance(solver, HiGHS):
+        return model.solverModel.getInfo().mip_gap
+    try:
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            log = f.read()
+    except (OSError, TypeError):
+        return None
+    if isinstance(solver, PULP_CBC_CMD):
+        # CBC:   "Gap:                            0.01"
+        matches = re.findall(r"^Gap:\s+([-+\d.eE]+)", log, re.MULTILINE)
+        scale = 1
+    elif isinstance(solver, HiGHS_CMD):
+        # HiGHS: "  Gap               0.52% (tolerance: 0.01%)"
+        matches = re.findall(r"^\s*Gap\s+([\d.eE+-]+)%", log, re.MULTILINE)
+        scale = 100
+    else:
+        # GLPK:  "+  1234: mip =   3.084000000e+03 <=   3.100000000e+03   0.5% (12; 0)"
+        matches = re.findall(r"mip =.*?([\d.]+)% \(", log)
+        scale = 100
+    if matches:
+        # CBC minimizes the negated objective of a maximization, so its gap can come out negative.
+        return abs(float(matches[-1])) / scale
+    # An optimal solve without a gap line closed the gap completely.
+    return 0.0 if model.sol_status == LpSolutionOptimal else None
+
+def read_first_incumbent_seconds(solver, log_path):
+    """
+    Returns the solver time, in seconds, at which the first feasible roster was found, or None if the solver
+    does not report it. Only CBC logs this; a MIP start that CBC accepts is logged as found by "Reduced search".
+    """
+    if not isinstance(solver, PULP_CBC_CMD):
+        return None
+    try:
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            log = f.read()
+    except OSError:
+        return None
+    # "Cbc0012I Integer solution of -8524 found by DiveCoefficient after 0 iterations and 0 nodes (2.61 seconds)"
+    times = re.findall(r"Integer solution of .*?\(([\d.]+) seconds\)", log)
+    return float(times[0]) if times else None
+
+# ------------------------------
+# Warm start: previous month's roster
+# ------------------------------
+
+def weekday_occurrences(dates):
+    """
+    For each date, returns (weekday, occurrence, is_last): the weekday number (Monday=0), which occurrence of that
+    weekday it is among the given dates (0 for the first), and whether it is the last one.
+    For example, the second working Tuesday of a month maps to (1, 1, False).
+    """
+    by_weekday = {}
+    for d in sorted(dates):
+        by_weekday.setdefault(d.weekday(), []).append(d)
+    result = {}
+    for wd, wd_dates in by_weekday.items():
+        for occ, d in enumerate(wd_dates):
+            result[d] = (wd, occ, occ == len(wd_dates) - 1)
+    return result
+
+def read_previous_roster(wb, sheet_name, name_to_id):
+    """
+    Reads a roster sheet written by generate_roster_schedule_ilp (dates in row 1, employee names in column A)
+    and returns a dictionary mapping (EmployeeID, weekday, occurrence) to the seat code assigned that day.
+    The last occurrence of each weekday is also stored under occurrence "last", so a 5th Monday this month can
+    follow last month's final Monday. Employees whose names are not in name_to_id are skipped.
+    Returns an empty dictionary if the sheet does not exist.
+    """
+    if sheet_name not in wb.sheetnames:
+        return {}
+    rows = list(wb[sheet_name].iter_rows(values_only=True))
+    if len(rows) < 3:
+        return {}
+    # Row 1 holds the dates (as "YYYY-MM-DD" text or as dates), starting in column B.
+    dates = {j: pd.to_datetime(v).to_pydatetime() for j, v in enumerate(rows[0]) if j > 0 and v}
+    occurrences = weekday_occurrences(dates.values())
+    previous = {}
+    for row in rows[2:]:
+        e = name_to_id.get(row[0])
+        if e is None:
+            continue
+        for j, d in dates.items():
+            if j < len(row) and row[j]:
+                wd, occ, is_last = occurrences[d]
+                previous[(e, wd, occ)] = row[j]
+                if is_last:
+                    previous[(e, wd, "last")] = row[j]
+    return previous
+
 # ------------------------------
 # Global ILP Rostering Solver with Fairness and Consecutive-Day Penalty
 # ------------------------------
 
 def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
-                                 consecutive_penalty=5, fairness_coef=20):
+                                 consecutive_penalty=5, fairness_coef=20, aggregate_seats=False,
+                                 solver="cbc", time_limit=None, gap_rel=None, threads=None, solver_msg=True,
+                                 warm_start=False):
     """
     This function builds and solves a global Integer Linear Programming (ILP) model that assigns seats to employees over the month.
     It ensures that:
@@ -187,7 +409,18 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
       - Row 1 (columns B onward): Dates in "YYYY-MM-DD" format.
       - Row 2 (columns B onward): The corresponding day-of-week (e.g., Mon, Tue).
       - Rows 3 onward: For each employee, the seat code assigned on that day (or blank if none).
+    With aggregate_seats=True, flexible seats that share the same available days and that nobody prefers are pooled
+    into seat classes: the model only decides how many of them are used each day, and concrete seat codes are handed
+    out after the solve. The optimal objective is the same as the full model's, with far fewer variables on large floors.
+    The solver is chosen with solver ("cbc", "highs" or "glpk") and bounded with time_limit (seconds), gap_rel (relative
+    MIP gap) and threads. If the solver stops early, the best feasible roster it found is used and its gap is reported.
+    With warm_start=True, last month's roster sheet (e.g., "Feb-25" for "Mar-25") is mapped onto this month by
+    weekday and occurrence, repaired to fit this month's seats and quotas, and given to the solver as a MIP start.
     """
+    # Check the solver before any work is done, so a missing backend fails fast. The solver that is run is
+    # built again right before the solve, with its log file.
+    lp_solver = make_solver(solver, time_limit, gap_rel, threads, solver_msg, warm_start=warm_start)
+    
     # Load the Excel workbook and get the "Static Data" sheet.
     wb = load_workbook(excel_file)
     static_ws = wb["Static Data"]
@@ -214,6 +447,9 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
     # Determine the list of working dates for the month (excluding weekends and public holidays).
     working_dates = get_working_dates(year, month, df_public_holidays["Date"])
     total_wd = len(working_dates)  # Total number of working days.
+    # Date labels used in variable and constraint names, formatted once per day.
+    day_label = {d: d.strftime("%d") for d in working_dates}
+    date_label = {d: d.strftime("%Y%m%d") for d in working_dates}
     
     # Calculate the monthly required assignments for each employee.
     req_days = {e: round(total_wd * office_percentage) for e in employees}
@@ -223,40 +459,24 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
     emp_subteam = dict(zip(df_employees["EmployeeID"], df_employees["SubTeam"]))
     
     # Determine designated days for each employee based on their sub-team.
-    # The designated_map maps a sub-team to a set of day tokens (e.g., {"mon", "wed"}).
-    designated_map = {}
-    for _, row in df_subteam_days.iterrows():
-        st = row["SubTeam"]
-        days_set = parse_days_string(row["OfficeDays"])
-        designated_map.setdefault(st, set()).update(days_set)
+    # The designated_map maps a sub-team to a set of weekday numbers (e.g., {0, 2} for Mon and Wed); each
+    # OfficeDays string is parsed once.
+    office_days = df_subteam_days["OfficeDays"].map(parse_weekdays)
+    designated_map = office_days.groupby(df_subteam_days["SubTeam"]).agg(lambda days: frozenset().union(*days)).to_dict()
+    # The designated working dates are worked out once per sub-team and shared by its employees.
+    subteam_dates = {st: frozenset(d for d in working_dates if d.weekday() in days) for st, days in designated_map.items()}
     # For each employee, designated_days[e] is the set of working dates that are designated for their sub-team.
-    designated_days = {}
-    for e in employees:
-        st = emp_subteam[e]
-        if st in designated_map:
-            designated_days[e] = {d for d in working_dates if (d.strftime("%a").lower() in designated_map[st] or d.strftime("%A").lower() in designated_map[st])}
-        else:
-            designated_days[e] = set()
+    designated_days = {e: subteam_dates.get(emp_subteam[e], frozenset()) for e in employees}
     
     # Determine special days from the SpecialSubTeamDays table.
     # For each working date, if it matches a special descriptor, record the associated sub-team and descriptor.
-    special = {}  # special[d] = (SpecialSubTeam, Descriptor)
-    for d in working_dates:
-        for _, row in df_special_days.iterrows():
-            desc = str(row["DayDescriptor"]).strip()
-            if is_day_descriptor_match(d, desc, working_dates):
-                special[d] = (row["SubTeam"], desc)
-                break  # Only one special sub-team per day is assumed.
+    special = match_day_descriptors(df_special_days, working_dates)  # special[d] = (SpecialSubTeam, Descriptor)
     
     # Read historical special allocation from the "SpecialHistory" sheet for fairness.
     hist = read_special_history(wb)  # This returns a dictionary with keys (Descriptor, EmployeeID).
     
     # Set up seat preference bonus: if an employee prefers a seat, they get extra bonus.
-    pref_bonus = {}
-    for _, row in df_seat_pref.iterrows():
-        e = row["EmployeeID"]
-        s = row["SeatCode"]
-        pref_bonus[(e, s)] = 10   # You can adjust this bonus value as needed.
+    pref_bonus = dict.fromkeys(zip(df_seat_pref["EmployeeID"], df_seat_pref["SeatCode"]), 10)  # You can adjust this bonus value as needed.
     
     # Define other bonus parameters:
     fill_bonus = 1             # Bonus for simply having a seat assigned.
@@ -269,29 +489,33 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
         return fairness_coef if hist.get((desc, e), 0) == 0 else 0
     
     # Determine seat availability for each seat and day.
-    # This checks if a seat is available on a day based on the "Days" field in SeatData.
-    seat_avail = {}
-    for _, srow in df_seats.iterrows():
-        s_code = srow["SeatCode"]
-        avail_set = parse_days_string(srow["Days"])
-        for d in working_dates:
-            d_abbr = d.strftime("%a").lower()
-            d_full = d.strftime("%A").lower()
-            seat_avail[(s_code, d)] = (d_abbr in avail_set or d_full in avail_set)
+    # This checks if a seat is available on a day based on the "Days" field in SeatData: a seats x working dates
+    # boolean matrix, built from one parse of each Days string.
+    avail = weekday_matrix(df_seats["Days"], working_dates)
+    seat_avail = {(s_code, d): bool(a) for s_code, row in zip(seats, avail) for d, a in zip(working_dates, row)}
     
     # Process fixed seat assignments: for seats with type "fixed" and an AssignedEmployeeID, force the assignment.
     fixed = {}
-    for _, row in df_seats.iterrows():
-        if str(row["SeatType"]).strip().lower() == "fixed":
-            assigned = row.get("AssignedEmployeeID")
-            if pd.notna(assigned):
-                s_code = row["SeatCode"]
-                avail_set = parse_days_string(row["Days"])
-                for d in working_dates:
-                    d_abbr = d.strftime("%a").lower()
-                    d_full = d.strftime("%A").lower()
-                    if d_abbr in avail_set or d_full in avail_set:
-                        fixed[(s_code, d)] = assigned
+    if "AssignedEmployeeID" in df_seats.columns:
+        is_fixed = (df_seats["SeatType"].astype(str).str.strip().str.lower() == "fixed") & df_seats["AssignedEmployeeID"].notna()
+        assigned_ids = df_seats["AssignedEmployeeID"].tolist()
+        for i in np.flatnonzero(is_fixed.to_numpy()):
+            for j in np.flatnonzero(avail[i]):
+                fixed[(seats[i], working_dates[j])] = assigned_ids[i]
+    
+    # ------------------------------
+    # Pre-assign fixed seats outside the model
+    # ------------------------------
+    # A fixed seat on one of its available days is not a decision: its owner sits there. So the seat is taken for
+    # that day and the owner needs no other seat that day; neither gets a decision variable, and the assignment
+    # enters the constraints and the objective below as a constant.
+    fixed_emp_day = {}  # fixed_emp_day[(e, d)] = the fixed seat employee e occupies on day d.
+    for (s, d), e_fixed in fixed.items():
+        if (e_fixed, d) in fixed_emp_day:
+            # An employee cannot sit in two fixed seats on the same day.
+            print(f"Employee {e_fixed} has more than one fixed seat on {d.strftime('%Y-%m-%d')}; no feasible roster exists.")
+            return
+        fixed_emp_day[(e_fixed, d)] = s
     
     # ------------------------------
     # Build the ILP Model using PuLP
@@ -301,12 +525,52 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
     model = LpProblem("GlobalTeamRostering", LpMaximize)
     
     # Decision variables: x[e,s,d] is a binary variable that is 1 if employee e is assigned seat s on day d.
+    # Variables are only created for feasible triples: the seat is available on the day, it is not a fixed seat
+    # on that day, and the employee is not already pre-assigned a fixed seat that day. Everything else is 0 by
+    # construction, so the model grows with the real options rather than employees x seats x days.
+    open_seats = {d: [s for s in seats if seat_avail[(s, d)] and (s, d) not in fixed] for d in working_dates}
+    
+    # Seat-class aggregation: flexible seats with the same availability that nobody prefers are interchangeable,
+    # since they earn the same bonus for everyone. On a given day it only matters how many of them are in use, so
+    # they are pooled: each employee gets one "pooled seat" variable per day, capped by the number of class seats
+    # available that day, instead of one variable per seat.
+    seat_classes = {}   # seat_classes[availability pattern] = seat codes sharing that pattern.
+    pooled_seats = set()
+    pool_capacity = {}  # pool_capacity[d] = number of pooled seats available on day d.
+    if aggregate_seats:
+        preferred = set(df_seat_pref["SeatCode"])
+        fixed_seats = {s for (s, d) in fixed}
+        for s in seats:
+            if s not in preferred and s not in fixed_seats:
+                pattern = tuple(seat_avail[(s, d)] for d in working_dates)
+                seat_classes.setdefault(pattern, []).append(s)
+        for i, d in enumerate(working_dates):
+            pool_capacity[d] = sum(len(codes) for pattern, codes in seat_classes.items() if pattern[i])
+        pooled_seats = {s for codes in seat_classes.values() for s in codes}
+        open_seats = {d: [s for s in open_seats[d] if s not in pooled_seats] for d in working_dates}
+        print(f"Pooled {len(pooled_seats)} interchangeable seats into {len(seat_classes)} seat classes.")
+    
     x = {}
+    pool = {}           # pool[(e, d)]: 1 if employee e takes a pooled seat on day d.
+    seat_day_vars = {}  # seat_day_vars[(s, d)]: the variables competing for seat s on day d.
+    emp_day_vars = {}   # emp_day_vars[(e, d)]: the variables for the seats employee e could take on day d.
     for e in employees:
-        for s in seats:
-            for d in working_dates:
-                var_name = f"x_{e}_{s}_{d.strftime('%d')}"
-                x[(e, s, d)] = LpVariable(var_name, cat=LpBinary)
+        for d in working_dates:
+            if (e, d) in fixed_emp_day:
+                continue
+            for s in open_seats[d]:
+                var = LpVariable(f"x_{e}_{s}_{day_label[d]}", cat=LpBinary)
+                x[(e, s, d)] = var
+                seat_day_vars.setdefault((s, d), []).append(var)
+                emp_day_vars.setdefault((e, d), []).append(var)
+            if pool_capacity.get(d):
+                var = LpVariable(f"p_{e}_{day_label[d]}", cat=LpBinary)
+                pool[(e, d)] = var
+                emp_day_vars.setdefault((e, d), []).append(var)
+    
+    def assigned(e, d):
+        # a(e,d): 1 if employee e is assigned a seat on day d, counting a pre-assigned fixed seat as a constant.
+        return lpSum(emp_day_vars.get((e, d), [])) + (1 if (e, d) in fixed_emp_day else 0)
     
     # For each employee with designated days, create a slack variable z_e (an integer >= 0)
     # This slack variable allows us to "softly" enforce a minimum number of designated-day assignments.
@@ -322,50 +586,45 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
         for i in range(len(working_dates) - 1):
             d = working_dates[i]
             # d_next is the day immediately after d in the working_dates list.
-            y[(e, d)] = LpVariable(f"y_{e}_{d.strftime('%d')}", cat=LpBinary)
+            y[(e, d)] = LpVariable(f"y_{e}_{day_label[d]}", cat=LpBinary)
     
     # ---- Add Constraints to the Model ----
     
     # Constraint 1: Each seat can be occupied by at most one employee on any given day.
-    for s in seats:
-        for d in working_dates:
-            model += lpSum(x[(e, s, d)] for e in employees) <= 1, f"SeatOccupancy_{s}_{d.strftime('%Y%m%d')}"
+    # A seat-day with a single candidate is already bounded by the variable being binary.
+    for (s, d), seat_vars in seat_day_vars.items():
+        if len(seat_vars) > 1:
+            model += lpSum(seat_vars) <= 1, f"SeatOccupancy_{s}_{date_label[d]}"
+    
+    # Constraint 1b: The pooled seats taken on a day cannot exceed the seat classes' capacity that day.
+    for d, capacity in pool_capacity.items():
+        if capacity:
+            model += lpSum(pool[(e, d)] for e in employees if (e, d) in pool) <= capacity, f"ClassCapacity_{date_label[d]}"
     
     # Constraint 2: Each employee can be assigned at most one seat per day.
-    for e in employees:
-        for d in working_dates:
-            model += lpSum(x[(e, s, d)] for s in seats) <= 1, f"EmployeeOneSeat_{e}_{d.strftime('%Y%m%d')}"
+    for (e, d), emp_vars in emp_day_vars.items():
+        if len(emp_vars) > 1:
+            model += lpSum(emp_vars) <= 1, f"EmployeeOneSeat_{e}_{date_label[d]}"
     
     # Constraint 3: Each employee must meet or exceed their overall monthly quota (required days).
     for e in employees:
-        model += lpSum(x[(e, s, d)] for s in seats for d in working_dates) >= req_days[e], f"RequiredDays_{e}"
+        model += lpSum(assigned(e, d) for d in working_dates) >= req_days[e], f"RequiredDays_{e}"
     
     # Constraint 4: For employees with designated days, enforce at least 'designated_min' assignments on those days (using slack variable z_e).
     for e in employees:
         if designated_days[e]:
-            model += lpSum(x[(e, s, d)] for s in seats for d in designated_days[e]) + z[e] >= designated_min, f"DesignatedMin_{e}"
+            model += lpSum(assigned(e, d) for d in designated_days[e]) + z[e] >= designated_min, f"DesignatedMin_{e}"
     
-    # Constraint 5: Fixed seat assignments must be enforced.
-    # For each fixed seat, force the assignment for the specified employee and disallow others.
-    for (s, d), e_fixed in fixed.items():
-        model += x[(e_fixed, s, d)] == 1, f"FixedSeat_{s}_{d.strftime('%Y%m%d')}"
-        for e in employees:
-            if e != e_fixed:
-                model += x[(e, s, d)] == 0, f"FixedSeatZero_{e}_{s}_{d.strftime('%Y%m%d')}"
-    
-    # Constraint 6: A seat cannot be assigned on a day when it is not available.
-    for s in seats:
-        for d in working_dates:
-            if not seat_avail[(s, d)]:
-                for e in employees:
-                    model += x[(e, s, d)] == 0, f"SeatNotAvail_{e}_{s}_{d.strftime('%Y%m%d')}"
+    # Constraint 5 (fixed seats) and Constraint 6 (seat availability) need no rows: fixed seats are pre-assigned
+    # above, and unavailable seat-days have no variables.
     
     # Constraint 7: For employees without fixed seats, do not allow extra flexible assignments on non-special days beyond their threshold.
-    F = [e for e in employees if e not in set(fixed.values())]  # F is the list of employees with no fixed-seat assignments.
+    fixed_employees = set(fixed.values())
+    F = [e for e in employees if e not in fixed_employees]  # F is the list of employees with no fixed-seat assignments.
     for e in F:
         # non_special_days: working days that are NOT special for the employee's sub-team.
         non_special_days = [d for d in working_dates if not (d in special and emp_subteam[e] == special[d][0])]
-        model += lpSum(x[(e, s, d)] for s in seats for d in non_special_days) <= req_days[e], f"NonSpecialUpper_{e}"
+        model += lpSum(assigned(e, d) for d in non_special_days) <= req_days[e], f"NonSpecialUpper_{e}"
     
     # Constraint 8: Linearize consecutive-day assignments.
     # For each employee and consecutive working day pair, ensure that the binary variable y[e,d] reflects if the employee is assigned on both days.
@@ -373,11 +632,11 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
         for i in range(len(working_dates) - 1):
             d = working_dates[i]
             d_next = working_dates[i+1]
-            a_ed = lpSum(x[(e, s, d)] for s in seats)      # a(e,d): 1 if assigned on day d.
-            a_e_next = lpSum(x[(e, s, d_next)] for s in seats)  # a(e,d_next): 1 if assigned on day d_next.
-            model += y[(e, d)] <= a_ed, f"Consec1_{e}_{d.strftime('%Y%m%d')}"
-            model += y[(e, d)] <= a_e_next, f"Consec2_{e}_{d.strftime('%Y%m%d')}"
-            model += y[(e, d)] >= a_ed + a_e_next - 1, f"Consec3_{e}_{d.strftime('%Y%m%d')}"
+            a_ed = assigned(e, d)            # a(e,d): 1 if assigned on day d.
+            a_e_next = assigned(e, d_next)   # a(e,d_next): 1 if assigned on day d_next.
+            model += y[(e, d)] <= a_ed, f"Consec1_{e}_{date_label[d]}"
+            model += y[(e, d)] <= a_e_next, f"Consec2_{e}_{date_label[d]}"
+            model += y[(e, d)] >= a_ed + a_e_next - 1, f"Consec3_{e}_{date_label[d]}"
     
     # Constraint 9: Avoid assigning the same employee on two consecutive days if not preferred.
     # We allow consecutive assignments if one day is designated and the other is a special day (for the employee's sub-team).
@@ -393,23 +652,30 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
     # The penalty for disallowed consecutive assignments will be added to the objective.
     
     # ---- Build the Objective Function ----
+    def assignment_bonus(e, s, d):
+        bonus = fill_bonus  # Start with the basic fill bonus.
+        # Add bonus if there is a seat preference.
+        if (e, s) in pref_bonus:
+            bonus += pref_bonus[(e, s)]
+        # Add bonus if the day is designated for the employee.
+        if d in designated_days[e]:
+            bonus += designated_bonus
+        # If the day is special and the employee is in that special sub-team, add special and fairness bonus.
+        if d in special and emp_subteam[e] == special[d][0]:
+            bonus += special_bonus + fairness_coef * (1 if (special[d][1], e) not in hist or hist.get((special[d][1], e), 0) == 0 else 0)
+        return bonus
+    
     obj_terms = []
     # Loop over every potential assignment.
-    for e in employees:
-        for s in seats:
-            for d in working_dates:
-                bonus = fill_bonus  # Start with the basic fill bonus.
-                # Add bonus if there is a seat preference.
-                if (e, s) in pref_bonus:
-                    bonus += pref_bonus[(e, s)]
-                # Add bonus if the day is designated for the employee.
-                if d in designated_days[e]:
-                    bonus += designated_bonus
-                # If the day is special and the employee is in that special sub-team, add special and fairness bonus.
-                if d in special and emp_subteam[e] == special[d][0]:
-                    bonus += special_bonus + fairness_coef * (1 if (special[d][1], e) not in hist or hist.get((special[d][1], e), 0) == 0 else 0)
-                # Multiply the bonus by the decision variable (which is 1 if the assignment is made, else 0).
-                obj_terms.append(bonus * x[(e, s, d)])
+    for (e, s, d), var in x.items():
+        # Multiply the bonus by the decision variable (which is 1 if the assignment is made, else 0).
+        obj_terms.append(assignment_bonus(e, s, d) * var)
+    # A pooled seat earns the bonus of any seat in its classes: no preference applies to it.
+    for (e, d), var in pool.items():
+        obj_terms.append(assignment_bonus(e, None, d) * var)
+    # Pre-assigned fixed seats earn their bonus as a constant, so the objective value matches the full model.
+    for (e, d), s in fixed_emp_day.items():
+        obj_terms.append(assignment_bonus(e, s, d))
     # Penalty for slack in designated-day assignments.
     penalty_terms = []
     for e in z:
@@ -424,24 +690,122 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
     # The total objective is to maximize the sum of bonuses minus the penalties.
     model += lpSum(obj_terms) - lpSum(penalty_terms) - lpSum(consec_penalty_terms), "TotalObjective"
     
+    # ------------------------------
+    # Warm start: last month's roster as the initial solution
+    # ------------------------------
+    if warm_start and not isinstance(lp_solver, (PULP_CBC_CMD, HiGHS_CMD)):
+        print(f"Solver '{solver}' does not accept a MIP start through PuLP; solving without a warm start.")
+    elif warm_start:
+        prev_month, prev_year = (12, year - 1) if month == 1 else (month - 1, year)
+        prev_sheet = f"{calendar.month_abbr[prev_month]}-{str(prev_year)[-len(year_str):]}"
+        previous = read_previous_roster(wb, prev_sheet, {name: e for e, name in emp_names.items()})
+        occurrences = weekday_occurrences(working_dates)
+        start_x = set()      # (e, s, d) assignments of the initial solution.
+        start_pool = set()   # (e, d) pooled-seat assignments of the initial solution.
+        busy = set(fixed_emp_day)              # (e, d) where the employee already has a seat.
+        taken = set(fixed)                     # (s, d) seats already in use.
+        pool_used = {d: 0 for d in working_dates}
+        
+        def place(e, d, s):
+            # Seat employee e in seat s on day d if the model allows it; s=None takes any free seat.
+            candidates = [s] if s is not None else open_seats[d] + sorted(pooled_seats)
+            for seat in candidates:
+                if (e, seat, d) in x and (seat, d) not in taken:
+                    start_x.add((e, seat, d))
+                    taken.add((seat, d))
+                elif seat in pooled_seats and (e, d) in pool and pool_used[d] < pool_capacity[d]:
+                    start_pool.add((e, d))
+                    pool_used[d] += 1
+                else:
+                    continue
+                busy.add((e, d))
+                return True
+            return False
+        
+        # Carry over last month's seat for the same weekday and occurrence (e.g., 2nd Tuesday -> 2nd Tuesday).
+        carried = 0
+        for d in working_dates:
+            wd, occ, is_last = occurrences[d]
+            for e in employees:
+                s = previous.get((e, wd, occ)) or (previous.get((e, wd, "last")) if is_last else None)
+                if s and (e, d) not in busy and place(e, d, s):
+                    carried += 1
+        # Repair the start so it satisfies this month's quotas: drop flexible days above the non-special limit,
+        # then top up employees below their required days, designated days first.
+        dropped = added = 0
+        for e in F:
+            extra = [d for d in working_dates if (e, d) in busy and not (d in special and emp_subteam[e] == special[d][0])][req_days[e]:]
+            for d in extra:
+                for key in [key for key in start_x if key[0] == e and key[2] == d]:
+                    start_x.discard(key)
+                    taken.discard((key[1], d))
+                if (e, d) in start_pool:
+                    start_pool.discard((e, d))
+                    pool_used[d] -= 1
+                busy.discard((e, d))
+                dropped += 1
+        for e in employees:
+            short = req_days[e] - sum((e, d) in busy for d in working_dates)
+            for d in sorted(working_dates, key=lambda d: d not in designated_days[e]):
+                if short <= 0:
+                    break
+                if (e, d) not in busy and place(e, d, None):
+                    short -= 1
+                    added += 1
+        
+        # Set every variable, so the solver gets a complete and consistent starting point.
+        for key, var in x.items():
+            var.setInitialValue(1 if key in start_x else 0)
+        for key, var in pool.items():
+            var.setInitialValue(1 if key in start_pool else 0)
+        for i in range(len(working_dates) - 1):
+            d, d_next = working_dates[i], working_dates[i+1]
+            for e in employees:
+                y[(e, d)].setInitialValue(1 if (e, d) in busy and (e, d_next) in busy else 0)
+        for e, var in z.items():
+            var.setInitialValue(max(0, designated_min - sum((e, d) in busy for d in designated_days[e])))
+        print(f"Warm start from '{prev_sheet}': {carried} assignments carried over, {dropped} dropped and {added} added to meet quotas "
+              f"(starting objective {value(model.objective):.1f}).")
+    
     # ------------------------------
     # Solve the ILP
     # ------------------------------
-    model.solve()
-    if LpStatus[model.status] != "Optimal":
-        print("No feasible solution found or solver did not converge to an optimal solution.")
+    # The solver log is only needed to read back the gap and the first-incumbent time, so it exists just for the solve.
+    log_fd, log_path = tempfile.mkstemp(prefix="roster_solver_", suffix=".log")
+    os.close(log_fd)
+    try:
+        lp_solver = make_solver(solver, time_limit, gap_rel, threads, solver_msg, log_path, warm_start)
+        model.solve(lp_solver)
+        gap = read_mip_gap(model, lp_solver, log_path)
+        first_incumbent = read_first_incumbent_seconds(lp_solver, log_path)
+    finally:
+        os.remove(log_path)
+    # Accept an optimal roster, or the best feasible one when the time limit or gap tolerance stopped the solver early.
+    if model.sol_status not in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        print(f"No feasible solution found (solver status: {LpStatus[model.status]}).")
         return
+    gap_text = f"{gap:.2%}" if gap is not None else "unknown"
+    if model.sol_status == LpSolutionOptimal:
+        print(f"Optimal roster found: objective {value(model.objective):.1f}, gap {gap_text}.")
+    else:
+        print(f"Solver stopped early; using the best roster found: objective {value(model.objective):.1f}, gap {gap_text}.")
+    if first_incumbent is not None:
+        print(f"First feasible roster found after {first_incumbent:.2f}s of solver time.")
     
     # ------------------------------
     # Extract the solution: for each employee and day, determine the seat assigned (if any).
     # ------------------------------
     emp_day_assign = {(e, d): None for e in employees for d in working_dates}
-    for e in employees:
-        for d in working_dates:
-            for s in seats:
-                if x[(e, s, d)].varValue == 1:
-                    emp_day_assign[(e, d)] = s
-                    break  # Since an employee can only be assigned one seat per day.
+    emp_day_assign.update(fixed_emp_day)  # Fixed seats were decided before the solve.
+    for (e, s, d), var in x.items():
+        if var.varValue is not None and var.varValue > 0.5:
+            emp_day_assign[(e, d)] = s  # An employee can only be assigned one seat per day.
+    # Turn pooled assignments into concrete seat codes.
+    pooled = {}
+    for (e, d), var in pool.items():
+        if var.varValue is not None and var.varValue > 0.5:
+            pooled.setdefault(d, []).append(e)
+    emp_day_assign.update(assign_class_seats(pooled, seat_classes, working_dates))
     
     # ------------------------------
     # Update the SpecialHistory sheet for fairness in future allocations.
@@ -518,7 +882,23 @@ def generate_roster_schedule_ilp(excel_file, designated_min=3, big_penalty=1000,
 # Main Execution
 # ------------------------------
 if __name__ == "__main__":
-    excel_filename = "TeamRoster.xlsx"  # Update this path if necessary.
+    parser = argparse.ArgumentParser(description="Generate the monthly seat roster with a global ILP.")
+    parser.add_argument("excel_file", nargs="?", default="TeamRoster.xlsx", help="Roster workbook (default: TeamRoster.xlsx).")
+    parser.add_argument("--designated_min", type=int, default=3, help="Soft minimum of designated-day assignments (default: 3).")
+    parser.add_argument("--big_penalty", type=float, default=1000, help="Penalty per missed designated-day assignment (default: 1000).")
+    parser.add_argument("--consecutive_penalty", type=float, default=5, help="Penalty per disallowed consecutive-day assignment (default: 5).")
+    parser.add_argument("--fairness_coef", type=float, default=20, help="Bonus for special-day slots missed last month (default: 20).")
+    parser.add_argument("--aggregate_seats", action="store_true", help="Pool interchangeable flexible seats into seat classes.")
+    parser.add_argument("--solver", choices=SOLVERS, default="cbc", help="Solver backend (default: cbc).")
+    parser.add_argument("--time_limit", type=float, default=None, help="Stop after this many seconds and use the best roster found.")
+    parser.add_argument("--gap_rel", type=float, default=None, help="Stop once the relative MIP gap is below this, e.g. 0.01 for 1%%.")
+    parser.add_argument("--threads", type=int, default=None, help="Number of solver threads.")
+    parser.add_argument("--warm_start", action="store_true", help="Start the solver from last month's roster sheet.")
+    parser.add_argument("--quiet", action="store_true", help="Hide the solver log.")
+    args = parser.parse_args()
     # Call the ILP solver function with desired parameters.
-    generate_roster_schedule_ilp(excel_filename, designated_min=3, big_penalty=1000,
-                                   consecutive_penalty=5, fairness_coef=20)
\ No newline at end of file
+    generate_roster_schedule_ilp(args.excel_file, designated_min=args.designated_min, big_penalty=args.big_penalty,
+                                 consecutive_penalty=args.consecutive_penalty, fairness_coef=args.fairness_coef,
+                                 aggregate_seats=args.aggregate_seats, solver=args.solver, time_limit=args.time_limit,
+                                 gap_rel=args.gap_rel, threads=args.threads, solver_msg=not args.quiet,
+                                 warm_start=args.warm_start)
\ No newline at end of file